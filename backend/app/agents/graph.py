@@ -1,149 +1,174 @@
+import asyncio
+import functools
+import logging
+from itertools import chain
+
+from pydantic import TypeAdapter
+
+from ..config import settings
 from ..services.llm import llm_client
 from ..services.rag import store
 from ..services.ingest import ingest_pdf, is_indexed, get_text
+from ..services.chunking import truncate_utf8, utf8_len
 from ..utils.logger import get_logger
 from ..schemas.analysis import AnalysisOptions, OutputFormat, FocusArea, AnalysisType
 
 logger = get_logger(__name__)
 
+# Built once so dict options reuse the compiled validator instead of going through __init__
+_OPT_ADAPTER = TypeAdapter(AnalysisOptions)
+
+_FOCUS_PROMPTS: dict[FocusArea, tuple[str, ...]] = {
+    FocusArea.METHODOLOGY: (
+        "Describe the methodology and experimental setup.",
+        "Summarize datasets, metrics, baselines, and evaluation steps.",
+    ),
+    FocusArea.LITERATURE_REVIEW: (
+        "Summarize related work and how this paper positions itself.",
+        "Highlight gaps this work addresses.",
+    ),
+    FocusArea.RESULTS: (
+        "Summarize quantitative and qualitative results and their significance.",
+    ),
+    FocusArea.TECH_STACK: (
+        "Extract implementation details: architectures, frameworks, hardware.",
+    ),
+}
+# OVERALL
+_FOCUS_DEFAULT: tuple[str, ...] = (
+    "Provide an overall context: problem, contributions, approach, and implications.",
+)
+
+_FMT_INSTR: dict[OutputFormat, str] = {
+    OutputFormat.BULLET_POINTS: "Format the output strictly as concise bullet points.",
+    OutputFormat.MIND_MAP: (
+        "Format the output as a hierarchical mind-map style outline with headings and nested bullets."
+    ),
+}
+_FMT_DEFAULT = "Write in well-structured paragraphs."
+
+_ANALYSIS_INSTR: dict[AnalysisType, str] = {
+    AnalysisType.CRITIQUE: "Focus on strengths, weaknesses, assumptions, and limitations.",
+    AnalysisType.NOTES: "Produce research notes with key terms and concise explanations.",
+}
+_ANALYSIS_DEFAULT = "Provide a clear, neutral summary of the paper."
+
+# Joined once per FocusArea at import instead of on every request
+_FOCUS_QUERY: dict[FocusArea, str] = {k: " ".join(v) for k, v in _FOCUS_PROMPTS.items()}
+_FOCUS_QUERY_DEFAULT = " ".join(_FOCUS_DEFAULT)
+_FOCUS_JOINED: dict[FocusArea, str] = {k: "\n- ".join(v) for k, v in _FOCUS_PROMPTS.items()}
+_FOCUS_JOINED_DEFAULT = "\n- ".join(_FOCUS_DEFAULT)
+
+
+@functools.lru_cache(maxsize=None)
+def _instruction_prefix(fmt: OutputFormat, analysis_type: AnalysisType, focus: FocusArea) -> str:
+    """Static head of rich_context; only the retrieved excerpts vary per request."""
+    fmt_instruction = _FMT_INSTR.get(fmt, _FMT_DEFAULT)
+    analysis_instruction = _ANALYSIS_INSTR.get(analysis_type, _ANALYSIS_DEFAULT)
+    global_instruction = (
+        f"Follow these instructions strictly:\n- {fmt_instruction}\n- {analysis_instruction}\n"
+    )
+    focus_joined = _FOCUS_JOINED.get(focus, _FOCUS_JOINED_DEFAULT)
+    return global_instruction + "\nFocus guidance:\n- " + focus_joined + "\n\nContext excerpts:\n"
+
+
 class AnalysisPipeline:
-    def _focus_prompts(self, focus: FocusArea) -> list[str]:
-        if focus == FocusArea.METHODOLOGY:
-            return [
-                "Describe the methodology and experimental setup.",
-                "Summarize datasets, metrics, baselines, and evaluation steps.",
-            ]
-        if focus == FocusArea.LITERATURE_REVIEW:
-            return [
-                "Summarize related work and how this paper positions itself.",
-                "Highlight gaps this work addresses.",
-            ]
-        if focus == FocusArea.RESULTS:
-            return [
-                "Summarize quantitative and qualitative results and their significance.",
-            ]
-        if focus == FocusArea.TECH_STACK:
-            return [
-                "Extract implementation details: architectures, frameworks, hardware.",
-            ]
-        # OVERALL
-        return [
-            "Provide an overall context: problem, contributions, approach, and implications.",
-        ]
+    def _focus_prompts(self, focus: FocusArea) -> tuple[str, ...]:
+        return _FOCUS_PROMPTS.get(focus, _FOCUS_DEFAULT)
 
     def _format_instruction(self, fmt: OutputFormat) -> str:
-        if fmt == OutputFormat.BULLET_POINTS:
-            return "Format the output strictly as concise bullet points."
-        if fmt == OutputFormat.MIND_MAP:
-            return (
-                "Format the output as a hierarchical mind-map style outline with headings and nested bullets."
-            )
-        return "Write in well-structured paragraphs."
+        return _FMT_INSTR.get(fmt, _FMT_DEFAULT)
 
     def _analysis_instruction(self, t: AnalysisType) -> str:
-        if t == AnalysisType.CRITIQUE:
-            return "Focus on strengths, weaknesses, assumptions, and limitations."
-        if t == AnalysisType.NOTES:
-            return "Produce research notes with key terms and concise explanations."
-        return "Provide a clear, neutral summary of the paper."
-
-    def run(self, pdf_path: str, options: AnalysisOptions | dict | None = None, paper_id: str | None = None) -> dict:
-        logger.info(f"[PIPELINE_START] Starting analysis pipeline for paper_id={paper_id}")
+        return _ANALYSIS_INSTR.get(t, _ANALYSIS_DEFAULT)
+
+    async def _prepare(self, pdf_path: str, options: AnalysisOptions | dict | None, paper_id: str | None) -> tuple[str, str, str]:
+        """Ingest if needed and retrieve context; returns (text, rich_context, style)."""
+        logger.info("[PIPELINE_START] Starting analysis pipeline for paper_id=%s", paper_id)
         
-        # Ensure the document is ingested (extract -> chunk+embed -> upsert)
+        # Parse options first: a ValueError here must not leave an ingest task running unawaited
+        opt = options if isinstance(options, AnalysisOptions) else _OPT_ADAPTER.validate_python(options or {})
+
+        # Ensure the document is ingested (extract -> chunk+embed -> upsert).
+        # Ingestion runs as a task so prompt construction below overlaps with it;
+        # only text loading and retrieval have to wait for it.
         doc_id = paper_id or pdf_path
+        ingest_task: asyncio.Task | None = None
         if not is_indexed(doc_id):
-            logger.info(f"Paper not indexed, running ingestion for {doc_id}")
-            ingest_pdf(doc_id, pdf_path)
+            logger.info("Paper not indexed, running ingestion for %s", doc_id)
+            ingest_task = asyncio.create_task(asyncio.to_thread(ingest_pdf, doc_id, pdf_path))
         else:
-            logger.info(f"Paper already indexed: {doc_id}")
-        
-        # Load stored plaintext for generation
-        text = get_text(doc_id) or ""
-        text_bytes = len(text.encode('utf-8'))
-        logger.info(f"Loaded paper text: {text_bytes} bytes ({len(text)} characters)")
-
-        # Parse options
-        opt = options if isinstance(options, AnalysisOptions) else AnalysisOptions(**(options or {}))
-        focus_prompts = self._focus_prompts(opt.focus_area)
-        
-        # OPTIMIZATION 1: Single combined query instead of 2 separate queries
-        # OLD: 2 queries (overview + focus) = 2 embedding calls + 2 Pinecone calls
-        # NEW: 1 query with combined intent = 1 embedding call + 1 Pinecone call
+            logger.info("Paper already indexed: %s", doc_id)
+
+        # OPTIMIZATION 1: Both retrieval intents go through one batched query
+        # (1 embedding call for both texts, Pinecone lookups issued concurrently)
         q_overview = "What is this paper about? Summarize the main contributions."
-        q_focus = " ".join(focus_prompts)
-        combined_query = f"{q_overview} Additionally, focus on: {q_focus}"
-        
-        logger.info(f"Retrieving context from vector store with single query k=4 (was 2 queries with k=2 each)")
-        ctx_all = store.query(combined_query, k=4, filter={"doc_id": {"$eq": doc_id}})
+        q_focus = _FOCUS_QUERY.get(opt.focus_area, _FOCUS_QUERY_DEFAULT)
+
+        # map output format to style hint
+        style = "medium"
+        instruction_prefix = _instruction_prefix(opt.output_format, opt.analysis_type, opt.focus_area)
+
+        if ingest_task is not None:
+            await ingest_task
+
+        # Load stored plaintext for generation while the vector store is queried
+        logger.info("Retrieving context from vector store with batched overview+focus queries (k=2 each)")
+        text, (ctx_over, ctx_focus) = await asyncio.gather(
+            asyncio.to_thread(get_text, doc_id),
+            store.abatch_query([q_overview, q_focus], k=2, filter={"doc_id": {"$eq": doc_id}}),
+        )
+        text = text or ""
+        # The UTF-8 size is only used for logging; skip the encode when INFO is filtered out
+        text_bytes = utf8_len(text) if logger.isEnabledFor(logging.INFO) else 0
+        logger.info("Loaded paper text: %d bytes (%d characters)", text_bytes, len(text))
         
-        logger.info(f"Retrieved {len(ctx_all)} context chunks with single query (saved 1 embedding + 1 Pinecone call)")
+        logger.info("Retrieved %d overview + %d focus context chunks (1 embedding call)", len(ctx_over), len(ctx_focus))
 
-        # Build context
-        raw_context = "\n\n".join([m["text"] for m in ctx_all])
+        # Build context (the two queries may surface the same chunk; keep the first occurrence)
+        raw_context = "\n\n".join(dict.fromkeys(m["text"] for m in chain(ctx_over, ctx_focus)))
         # Truncate to prevent context overflow
-        from ..config import settings
         max_ctx_bytes = settings.gemini_max_context_bytes
-        context_bytes_raw = raw_context.encode('utf-8')
-        if len(context_bytes_raw) > max_ctx_bytes:
-            context = context_bytes_raw[:max_ctx_bytes].decode('utf-8', errors='ignore')
-            logger.info(f"Context truncated from {len(context_bytes_raw)} to {max_ctx_bytes} bytes")
-        else:
-            context = raw_context
-        
-        context_bytes = len(context.encode('utf-8'))
-        logger.info(f"Total context size: {context_bytes} bytes")
+        context = truncate_utf8(raw_context, max_ctx_bytes)
+        if len(context) < len(raw_context):
+            logger.info("Context truncated from %d chars to %d bytes", len(raw_context), max_ctx_bytes)
+        logger.info("Total context size: %d characters", len(context))
 
         # 4) Generate with Gemini
-        # map output format to style hint
-        style = "medium"
-        fmt_instruction = self._format_instruction(opt.output_format)
-        analysis_instruction = self._analysis_instruction(opt.analysis_type)
-        global_instruction = (
-            f"Follow these instructions strictly:\n- {fmt_instruction}\n- {analysis_instruction}\n"
-        )
-        rich_context = global_instruction + "\nFocus guidance:\n- " + "\n- ".join(focus_prompts) + "\n\nContext excerpts:\n" + context
-        
-        logger.info(f"Calling consolidated LLM analysis. Paper text size: {text_bytes} bytes, Context size: {context_bytes} bytes")
-        
-        # OPTIMIZATION 2: Direct analysis without extraction (unless truly massive)
-        # Pass paper_id to LLM for better identification
-        analysis_results = llm_client.analyze_all_sections(
-            text=text,
-            style=style,
-            context=rich_context,
-            paper_id=paper_id  # NEW: Pass paper_id for identification
-        )
+        rich_context = instruction_prefix + context
         
+        logger.info("Calling consolidated LLM analysis. Paper text size: %d bytes, Context size: %d characters", text_bytes, len(context))
+        return text, rich_context, style
+
+    async def _complete(self, analysis_results: dict, text: str, rich_context: str, pdf_path: str, paper_id: str | None) -> dict:
+        """Fill any sections the consolidated analysis left empty and build the result dict."""
         overview = analysis_results["summary"]
         critique = analysis_results["critique"]
         findings = analysis_results["key_findings"]
         cites = analysis_results["citations"]
 
-        # Fallbacks: if any section is empty, derive them with lightweight single-purpose prompts
-        if not (critique or "").strip():
-            logger.info("Critique missing from consolidated analysis. Falling back to dedicated critique generation.")
-            try:
-                critique = llm_client.critique(text, context=rich_context)
-            except Exception as e:
-                logger.warning(f"Critique fallback failed: {e}")
-
-        if not findings:
-            logger.info("Key findings missing from consolidated analysis. Falling back to dedicated key findings generation.")
-            try:
-                findings = llm_client.key_findings(text, context=rich_context)
-            except Exception as e:
-                logger.warning(f"Key findings fallback failed: {e}")
-
-        if not cites:
-            logger.info("Citations missing from consolidated analysis. Falling back to dedicated citations extraction.")
+        # Fallback: if any section is empty, request all missing sections in ONE structured
+        # JSON call instead of one dedicated call per section.
+        missing = [
+            name for name, value in (
+                ("critique", (critique or "").strip()),
+                ("key_findings", findings),
+                ("citations", cites),
+            ) if not value
+        ]
+        if missing:
+            logger.info("Sections missing from consolidated analysis: %s. Requesting them in a single follow-up call.", missing)
             try:
-                cites = llm_client.citations(text)
+                patch = await llm_client.afill_missing(text, rich_context, missing)
             except Exception as e:
-                logger.warning(f"Citations fallback failed: {e}")
+                logger.warning("Fallback for %s failed: %s", missing, e)
+                patch = {}
+            critique = patch.get("critique", critique)
+            findings = patch.get("key_findings", findings)
+            cites = patch.get("citations", cites)
         
-        logger.info(f"LLM analysis completed. Generated summary: {len(overview)} chars, findings: {len(findings)}, citations: {len(cites)}")
-        logger.info(f"[PIPELINE_COMPLETE] Completed for paper_id={paper_id}")
+        logger.info("LLM analysis completed. Generated summary: %d chars, findings: %d, citations: %d", len(overview), len(findings), len(cites))
+        logger.info("[PIPELINE_COMPLETE] Completed for paper_id=%s", paper_id)
 
         # OPTIMIZATION 3: Return paper_id in results for multi-paper tracking
         return {
@@ -157,4 +182,41 @@ class AnalysisPipeline:
             "citations": cites,
         }
 
+    async def run(self, pdf_path: str, options: AnalysisOptions | dict | None = None, paper_id: str | None = None) -> dict:
+        text, rich_context, style = await self._prepare(pdf_path, options, paper_id)
+
+        # OPTIMIZATION 2: Direct analysis without extraction (unless truly massive)
+        # Pass paper_id to LLM for better identification
+        analysis_results = await llm_client.aanalyze_all_sections(
+            text=text,
+            style=style,
+            context=rich_context,
+            paper_id=paper_id  # NEW: Pass paper_id for identification
+        )
+        return await self._complete(analysis_results, text, rich_context, pdf_path, paper_id)
+
+    async def arun_stream(self, pdf_path: str, options: AnalysisOptions | dict | None = None, paper_id: str | None = None):
+        """Like run(), but yields {"paper_id", "section", "content"} events as sections complete.
+
+        The last event has section "result" and carries the same dict run() returns.
+        """
+        text, rich_context, style = await self._prepare(pdf_path, options, paper_id)
+
+        analysis_results = {"summary": "", "critique": "", "key_findings": [], "citations": []}
+        async for key, value in llm_client.astream_all_sections(
+            text=text,
+            style=style,
+            context=rich_context,
+            paper_id=paper_id
+        ):
+            analysis_results[key] = value
+            yield {"paper_id": paper_id, "section": key, "content": value}
+
+        result = await self._complete(analysis_results, text, rich_context, pdf_path, paper_id)
+        # Sections recovered by the fallback call were never streamed
+        for key, value in (("critique", result["feedback"]), ("key_findings", result["key_findings"]), ("citations", result["citations"])):
+            if value != analysis_results[key]:
+                yield {"paper_id": paper_id, "section": key, "content": value}
+        yield {"paper_id": paper_id, "section": "result", "content": result}
+
 pipeline = AnalysisPipeline()
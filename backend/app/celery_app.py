@@ -0,0 +1,25 @@
+"""Optional Celery app for running PDF ingestion on dedicated workers.
+
+Enabled when CELERY_BROKER_URL is set and celery is installed; start workers with
+    celery -A app.celery_app worker --concurrency=4
+"""
+from .config import settings
+from .services.ingest import ingest_pdf
+
+try:
+    from celery import Celery
+except ImportError:  # optional dependency
+    Celery = None
+
+celery_app = (
+    Celery("research_ai_agent", broker=settings.celery_broker_url)
+    if Celery is not None and settings.celery_broker_url
+    else None
+)
+
+if celery_app is not None:
+    @celery_app.task(name="ingest_pdf")
+    def ingest_pdf_task(paper_id: str, pdf_path: str, filename: str | None = None) -> None:
+        ingest_pdf(paper_id, pdf_path, filename)
+else:
+    ingest_pdf_task = None
@@ -1,10 +1,13 @@
 import os
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class Settings(BaseModel):
+    # Settings are read-only after startup; frozen also makes the instance hashable
+    model_config = ConfigDict(frozen=True)
+
     arxiv_api_base: str = os.getenv("ARXIV_API_BASE", "http://export.arxiv.org/api/query")
 
     gemini_api_key: str | None = os.getenv("GEMINI_API_KEY")
@@ -12,15 +15,44 @@ class Settings(BaseModel):
     gemini_embedding_model: str = os.getenv("GEMINI_EMBED_MODEL", "text-embedding-004")
     gemini_max_retries: int = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
     gemini_retry_backoff: float = float(os.getenv("GEMINI_RETRY_BACKOFF", "1.0"))
+    # Max concurrent async Gemini generations (chunk fan-out shares this budget)
+    gemini_concurrency: int = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+    # Embedding sub-batches (of up to 100 texts) in flight at once for large inputs
+    gemini_embed_concurrency: int = int(os.getenv("GEMINI_EMBED_CONCURRENCY", "4"))
+    # Requests per minute across the process (paced with gemini_concurrency as the burst); 0 = no limit
+    gemini_rpm: int = int(os.getenv("GEMINI_RPM", "0"))
+    # Texts embedded per minute across the process (a batch call counts each text); 0 = no limit
+    gemini_embed_rpm: int = int(os.getenv("GEMINI_EMBED_RPM", "0"))
     
     # OPTIMIZED: Increased chunk size from 6000 to 8000 to reduce embedding calls by ~25%
     gemini_gen_chunk_bytes: int = int(os.getenv("GEMINI_GEN_CHUNK_BYTES", "8000"))
+    # Generation chunks are packed on paragraph/sentence boundaries by token count
+    gemini_gen_chunk_tokens: int = int(os.getenv("GEMINI_GEN_CHUNK_TOKENS", "12000"))
+    gemini_gen_chunk_overlap: int = int(os.getenv("GEMINI_GEN_CHUNK_OVERLAP", "200"))
     
     gemini_max_output_tokens: int = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "2048"))
+    # Unset keeps the model's default sampling; 0 makes outputs reproducible, which is what
+    # makes cached generations and results replay exactly what a fresh call would return
+    gemini_temperature: float | None = float(os.environ["GEMINI_TEMPERATURE"]) if os.getenv("GEMINI_TEMPERATURE") else None
+    # Exact-prompt response cache for generations (memory LRU + shared SQLite store)
+    gemini_cache_enabled: bool = os.getenv("GEMINI_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"}
+    gemini_cache_ttl: float = float(os.getenv("GEMINI_CACHE_TTL", "86400"))
+    gemini_cache_size: int = int(os.getenv("GEMINI_CACHE_SIZE", "512"))
+    # Similarity cache over embedded request heads; off by default since a hit answers a similar prompt
+    gemini_semantic_cache: bool = os.getenv("GEMINI_SEMANTIC_CACHE", "false").lower() in {"1", "true", "yes"}
+    gemini_semantic_threshold: float = float(os.getenv("GEMINI_SEMANTIC_THRESHOLD", "0.97"))
+    gemini_semantic_cache_size: int = int(os.getenv("GEMINI_SEMANTIC_CACHE_SIZE", "256"))
+    gemini_semantic_probe_bytes: int = int(os.getenv("GEMINI_SEMANTIC_PROBE_BYTES", "8000"))
     gemini_max_context_bytes: int = int(os.getenv("GEMINI_MAX_CONTEXT_BYTES", "5000"))
     
     # OPTIMIZED: Increased from 30000 to handle larger papers without extra extraction call
     gemini_max_total_bytes: int = int(os.getenv("GEMINI_MAX_TOTAL_BYTES", "50000"))
+    # Hard ceiling on one request's input (prompt parts); larger requests fail before any API call.
+    # ~1M tokens at ~4 bytes per token, the gemini-1.5 context window; 0 disables the check
+    gemini_max_request_bytes: int = int(os.getenv("GEMINI_MAX_REQUEST_BYTES", "4000000"))
+    # Papers over gemini_max_total_bytes: "truncate" to one consolidated call, or "chunked" to
+    # send the consolidated prompt for every chunk concurrently and merge (1 call per chunk)
+    gemini_oversize_strategy: str = os.getenv("GEMINI_OVERSIZE_STRATEGY", "truncate")
     
     # OPTIMIZED: Effectively disabled extraction (set very high threshold)
     # This removes the extra API call for most papers
@@ -29,6 +61,10 @@ class Settings(BaseModel):
     gemini_emb_trunc_bytes: int = int(os.getenv("GEMINI_EMB_TRUNC_BYTES", "24000"))
     gemini_probe_on_startup: bool = os.getenv("GEMINI_PROBE_ON_STARTUP", "false").lower() in {"1", "true", "yes"}
     gemini_verify_dim: bool = os.getenv("GEMINI_VERIFY_DIM", "false").lower() in {"1", "true", "yes"}
+    # Open Gemini/Pinecone connections at startup so the first request skips the handshakes
+    warmup_on_startup: bool = os.getenv("WARMUP_ON_STARTUP", "true").lower() in {"1", "true", "yes"}
+    # Seconds each warm-up call may take before startup carries on without it
+    warmup_timeout: float = float(os.getenv("WARMUP_TIMEOUT", "10"))
 
     pinecone_api_key: str | None = os.getenv("PINECONE_API_KEY")
     pinecone_index: str = os.getenv("PINECONE_INDEX", "research-summaries")
@@ -38,6 +74,28 @@ class Settings(BaseModel):
     # UPDATED: Default dimension for text-embedding-004 is 768
     pinecone_dim: int = int(os.getenv("PINECONE_DIM", "768"))
     
+    # Vector-store query result cache (LRU + TTL); set QUERY_CACHE_SIZE=0 to disable
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "2000"))
+    query_cache_ttl: float = float(os.getenv("QUERY_CACHE_TTL", "600"))
+    # Papers whose vectors this process upserted are kept for local doc-scoped ranking (0 disables);
+    # papers with more chunks than the cap are left to Pinecone
+    rag_mirror_docs: int = int(os.getenv("RAG_MIRROR_DOCS", "64"))
+    rag_mirror_max_chunks: int = int(os.getenv("RAG_MIRROR_MAX_CHUNKS", "500"))
+    # Whole-pipeline result cache keyed on (PDF sha256, options, model); 0 disables it
+    result_cache_ttl: float = float(os.getenv("RESULT_CACHE_TTL", "86400"))
+    # Results kept in memory in front of the on-disk result cache
+    cache_max_entries: int = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+    # Papers analyzed concurrently across all /analysis/run jobs
+    max_parallel_papers: int = int(os.getenv("MAX_PARALLEL_PAPERS", "4"))
+    # Threads for concurrent Pinecone queries; also sizes the Index client's pool
+    pinecone_pool_threads: int = int(os.getenv("PINECONE_POOL_THREADS", "8"))
+    # Data-plane calls over gRPC/protobuf instead of REST/JSON (needs pinecone-client[grpc])
+    pinecone_grpc: bool = os.getenv("PINECONE_GRPC", "false").lower() in {"1", "true", "yes"}
+    
+    # Ingestion runs on Celery workers when a broker is set, else in a local process pool
+    celery_broker_url: str | None = os.getenv("CELERY_BROKER_URL")
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", "2"))
+
     storage_dir: str = os.getenv("STORAGE_DIR", "storage") 
 
 settings = Settings()
@@ -1,17 +1,66 @@
 from fastapi import FastAPI, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import os
 
 from .routers import auth, papers, analysis, history, settings as settings_router
 from .utils.logger import get_logger
+from .config import settings
+from .services.llm import _model
+from .services.rag import store
 
 logger = get_logger(__name__)
 
-app = FastAPI(title="Research Paper Analyzer/Summarizer API", version="0.1.0")
+async def _warm_up() -> None:
+    """Open the Gemini and Pinecone connections before the first real request needs them.
+    Each call gets WARMUP_TIMEOUT seconds, so a hung network path cannot block startup."""
+    timeout = settings.warmup_timeout
+    if settings.gemini_api_key:
+        try:
+            # count_tokens goes through the same async client/channel as generation, at no generation cost
+            await asyncio.wait_for(_model().count_tokens_async("warmup"), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Gemini warm-up skipped: no answer within {timeout}s")
+        except Exception as e:
+            logger.warning(f"Gemini warm-up skipped: {e}")
+    if settings.pinecone_api_key:
+        try:
+            # Abandoning the wait leaves the thread to finish (or build the store) on its own
+            await asyncio.wait_for(asyncio.to_thread(lambda: store.index.describe_index_stats()), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Pinecone warm-up skipped: no answer within {timeout}s")
+        except Exception as e:
+            logger.warning(f"Pinecone warm-up skipped: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.warmup_on_startup:
+        await _warm_up()
+    yield
+    await papers.close_http_client()
+
+
+try:
+    import orjson  # noqa: F401
+    # orjson serializes the large nested /analysis/status payloads several times faster
+    _DefaultResponse = ORJSONResponse
+except ImportError:
+    _DefaultResponse = JSONResponse
+
+
+app = FastAPI(
+    title="Research Paper Analyzer/Summarizer API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=_DefaultResponse,
+)
 
 # CORS
 app.add_middleware(
@@ -1,88 +1,269 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional, List, Dict
+import asyncio
+import hashlib
+import json
 import time
+import uuid
+from collections import OrderedDict
 from ..agents.graph import pipeline
+from ..config import settings
 from .papers import PAPERS
 from ..schemas.analysis import AnalysisRequest, AnalysisOptions
-from ..utils.session_store import save_session, get_session, list_sessions
+from ..utils.session_store import save_session, get_session, list_sessions, list_session_summaries
+from ..utils import result_cache
+from ..utils.etag import etag_json_response, not_modified
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
+# In-flight analysis jobs. Holding the task here also keeps it from being garbage
+# collected before it finishes; entries are dropped once the session is saved.
+JOBS: Dict[str, asyncio.Task] = {}
+_JOB_PROGRESS: Dict[str, tuple[int, int]] = {}  # job_id -> (papers done, papers total)
+# job_id -> paper_id -> sections streamed so far, so polls see the summary before the tail
+_JOB_PARTIAL: Dict[str, Dict[str, dict]] = {}
+# job_id -> (session updated_at, ETag) for finished jobs, so a matching poll skips serialization.
+# Finished jobs are polled after _forget_job ran, so the map is also capped (oldest out)
+_STATUS_ETAGS: "OrderedDict[str, tuple[int, str]]" = OrderedDict()
+_STATUS_ETAGS_MAX = 1024
+# Pending/running payloads change between polls (progress, partial sections), so browsers
+# must revalidate each one instead of reusing it for the default max-age
+_LIVE_CACHE_CONTROL = "private, no-cache"
+# Shared across jobs so concurrent batches together stay within the Gemini/Pinecone budget
+_PAPER_SEM = asyncio.Semaphore(settings.max_parallel_papers)
+
+
+def _result_key(pdf_path: str, options: AnalysisOptions) -> str:
+    options_json = json.dumps(options.model_dump(mode="json"), sort_keys=True)
+    options_hash = hashlib.blake2b((options_json + settings.gemini_model).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{result_cache.file_sha256(pdf_path)}_{options_hash}"
+
+
+def _cached_result(paper_id: str, options: AnalysisOptions) -> dict | None:
+    """Blocking (hashes the PDF); call through asyncio.to_thread."""
+    if settings.result_cache_ttl <= 0:
+        return None
+    path = PAPERS[paper_id]["path"]
+    try:
+        cached = result_cache.get(_result_key(path, options), settings.result_cache_ttl)
+    except OSError:
+        return None
+    if cached is None:
+        return None
+    # Keyed on content, so the hit may come from the same PDF uploaded under another id
+    return {**cached, "paper_id": paper_id, "paper_path": path}
+
+
+def _remember_result(paper_id: str, options: AnalysisOptions, result: dict) -> None:
+    """Blocking (hashes the PDF, writes the cache file); call through asyncio.to_thread."""
+    # A failed consolidated call still returns a dict (with an error summary and
+    # empty sections); only cache results that actually produced analysis
+    if settings.result_cache_ttl > 0 and (result.get("feedback") or result.get("key_findings")):
+        try:
+            result_cache.put(_result_key(PAPERS[paper_id]["path"], options), result)
+        except OSError as e:
+            logger.warning("Could not cache result for paper_id=%s: %s", paper_id, e)
+
+
+async def _analyze_paper(paper_id: str, options: AnalysisOptions, partial: dict | None = None) -> dict:
+    """Run the pipeline for one paper, serving repeat (PDF, options, model) requests from cache.
+
+    Sections are recorded into `partial` as the model streams them.
+    """
+    cached = await asyncio.to_thread(_cached_result, paper_id, options)
+    if cached is not None:
+        logger.info("Result cache hit for paper_id=%s", paper_id)
+        return cached
+    result = None
+    async for event in pipeline.arun_stream(PAPERS[paper_id]["path"], options, paper_id=paper_id):
+        if event["section"] == "result":
+            result = event["content"]
+        elif partial is not None:
+            partial[event["section"]] = event["content"]
+    await asyncio.to_thread(_remember_result, paper_id, options, result)
+    return result
+
+
+async def _run_batch(job_id: str, paper_ids: List[str], options: AnalysisOptions) -> None:
+    """Run the pipeline for every paper concurrently and persist the batch session."""
+    # Process each paper separately to avoid mixing results
+    results_by_paper: Dict[str, dict] = {}
+
+    async def one(paper_id: str) -> dict:
+        async with _PAPER_SEM:
+            logger.info("[JOB %s] Starting pipeline execution for paper_id=%s", job_id, paper_id)
+            # Run analysis for this specific paper
+            partial = _JOB_PARTIAL.setdefault(job_id, {}).setdefault(paper_id, {})
+            result = await _analyze_paper(paper_id, options, partial)
+        results_by_paper[paper_id] = result
+        _JOB_PROGRESS[job_id] = (len(results_by_paper), len(paper_ids))
+        logger.info("[JOB %s] Analysis successful for paper_id=%s", job_id, paper_id)
+        return result
+
+    outcomes = await asyncio.gather(*(one(pid) for pid in paper_ids), return_exceptions=True)
+    errors = {pid: str(o) for pid, o in zip(paper_ids, outcomes) if isinstance(o, BaseException)}
+    # Keep results in request order rather than completion order
+    ordered = {pid: results_by_paper[pid] for pid in paper_ids if pid in results_by_paper}
+
+    session = {
+        "paper_ids": paper_ids,  # Track which papers were analyzed
+        "options": options.model_dump(),
+        "status": "failed" if errors else "done",
+        "results": ordered,  # Dict keyed by paper_id
+        "paper_count": len(paper_ids),
+    }
+    if errors:
+        logger.error("[JOB %s] Analysis failed for %s", job_id, errors)
+        session["error"] = "; ".join(f"{pid}: {err}" for pid, err in errors.items())
+    await asyncio.to_thread(save_session, job_id, session)
+    if not errors:
+        logger.info("[JOB %s] Batch analysis successful for %d papers", job_id, len(paper_ids))
+
+
+def _forget_job(job_id: str) -> None:
+    JOBS.pop(job_id, None)
+    _JOB_PROGRESS.pop(job_id, None)
+    _JOB_PARTIAL.pop(job_id, None)
+    _STATUS_ETAGS.pop(job_id, None)
+
+
 @router.post("/run")
-def run_analysis(payload: AnalysisRequest):
+async def run_analysis(payload: AnalysisRequest):
     """
     OPTIMIZED: Support single or multiple papers.
-    Returns results keyed by paper_id to avoid mixing.
+    Schedules the analysis as a background task and returns its job_id immediately;
+    poll /status/{job_id} for results keyed by paper_id.
     """
-    logger.info(f"[ENDPOINT] POST /analysis/run received for paper_ids={payload.paper_ids}")
+    logger.info("[ENDPOINT] POST /analysis/run received for paper_ids=%s", payload.paper_ids)
 
     # Validate all papers exist
     missing = [pid for pid in payload.paper_ids if pid not in PAPERS]
     if missing:
-        logger.error(f"[ENDPOINT] Papers not found: {missing}")
+        logger.error("[ENDPOINT] Papers not found: %s", missing)
         raise HTTPException(status_code=404, detail=f"Papers not found: {missing}")
 
-    try:
-        # Process each paper separately to avoid mixing results
-        results_by_paper: Dict[str, dict] = {}
-        
-        for paper_id in payload.paper_ids:
-            paper = PAPERS[paper_id]
-            logger.info(f"[ENDPOINT] Starting pipeline execution for paper_id={paper_id}")
-            
-            # Run analysis for this specific paper
-            result = pipeline.run(
-                paper["path"], 
-                payload.options or AnalysisOptions(), 
-                paper_id=paper_id
-            )
-            
-            # Store with paper_id as key
-            results_by_paper[paper_id] = result
-            logger.info(f"[ENDPOINT] Analysis successful for paper_id={paper_id}")
-
-        # Generate a job_id for the batch
-        job_id = f"batch_{int(time.time())}_{len(payload.paper_ids)}_papers"
-
-        # Save session with all results
-        options_dict = payload.options.model_dump() if payload.options else {}
-        save_session(job_id, {
-            "paper_ids": payload.paper_ids,  # Track which papers were analyzed
-            "options": options_dict,
-            "status": "done",
-            "results": results_by_paper,  # Dict keyed by paper_id
-            "paper_count": len(payload.paper_ids),
-        })
+    # Jobs now overlap, so the timestamp alone no longer identifies a batch
+    job_id = f"batch_{int(time.time())}_{len(payload.paper_ids)}_papers_{uuid.uuid4().hex[:8]}"
+
+    options = payload.options or AnalysisOptions()
+    # Persist the running state so /status answers correctly from any worker, not just this one
+    await asyncio.to_thread(save_session, job_id, {
+        "paper_ids": payload.paper_ids,
+        "options": options.model_dump(),
+        "status": "running",
+        "paper_count": len(payload.paper_ids),
+    })
+    task = asyncio.create_task(_run_batch(job_id, payload.paper_ids, options))
+    JOBS[job_id] = task
+    _JOB_PROGRESS[job_id] = (0, len(payload.paper_ids))
+    task.add_done_callback(lambda _t: _forget_job(job_id))
+
+    logger.info("[ENDPOINT] Scheduled job %s for %d papers", job_id, len(payload.paper_ids))
+    return {
+        "job_id": job_id,
+        "paper_count": len(payload.paper_ids),
+        "paper_ids": payload.paper_ids
+    }
 
-        logger.info(f"[ENDPOINT] Batch analysis successful for {len(payload.paper_ids)} papers")
-        return {
-            "job_id": job_id,
+@router.post("/stream")
+async def stream_analysis(payload: AnalysisRequest):
+    """
+    Streaming variant of /run: one NDJSON line per completed section, so the first
+    section arrives after first-token latency instead of after the whole generation.
+    The first line carries the job_id; the session is saved once all papers finish.
+    """
+    logger.info("[ENDPOINT] POST /analysis/stream received for paper_ids=%s", payload.paper_ids)
+
+    missing = [pid for pid in payload.paper_ids if pid not in PAPERS]
+    if missing:
+        logger.error("[ENDPOINT] Papers not found: %s", missing)
+        raise HTTPException(status_code=404, detail=f"Papers not found: {missing}")
+
+    job_id = f"batch_{int(time.time())}_{len(payload.paper_ids)}_papers_{uuid.uuid4().hex[:8]}"
+    options = payload.options or AnalysisOptions()
+
+    async def events():
+        yield json.dumps({"job_id": job_id, "paper_ids": payload.paper_ids}) + "\n"
+        results_by_paper: Dict[str, dict] = {}
+        session = {
+            "paper_ids": payload.paper_ids,
+            "options": options.model_dump(),
+            "status": "failed",  # until every paper has streamed
+            "results": results_by_paper,
             "paper_count": len(payload.paper_ids),
-            "paper_ids": payload.paper_ids
         }
+        try:
+            for paper_id in payload.paper_ids:
+                logger.info("[ENDPOINT] Starting streamed pipeline execution for paper_id=%s", paper_id)
+                cached = await asyncio.to_thread(_cached_result, paper_id, options)
+                if cached is not None:
+                    logger.info("Result cache hit for paper_id=%s", paper_id)
+                    results_by_paper[paper_id] = cached
+                    yield json.dumps({"paper_id": paper_id, "section": "result", "content": cached}) + "\n"
+                    continue
+                async for event in pipeline.arun_stream(PAPERS[paper_id]["path"], options, paper_id=paper_id):
+                    if event["section"] == "result":
+                        results_by_paper[paper_id] = event["content"]
+                        await asyncio.to_thread(_remember_result, paper_id, options, event["content"])
+                    yield json.dumps(event) + "\n"
+            session["status"] = "done"
+        except Exception as e:
+            logger.error("[ENDPOINT] Streamed analysis %s failed: %s", job_id, e)
+            session["error"] = str(e)
+            raise
+        finally:
+            # Saved on errors and client disconnects too, so the job_id the client already has
+            # resolves in /status and history; shielded so a cancelled stream still saves
+            await asyncio.shield(asyncio.to_thread(save_session, job_id, session))
+        logger.info("[ENDPOINT] Streamed batch analysis successful for %d papers", len(payload.paper_ids))
 
-    except Exception as e:
-        logger.error(f"[ENDPOINT] Analysis failed: {e}")
-        raise
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
 @router.get("/status/{job_id}")
-def status(job_id: str):
-    """Get status and results for a job (single or multi-paper)."""
+def status(job_id: str, request: Request):
+    """Get status and results for a job (single or multi-paper).
+
+    Responses carry an ETag; finished jobs never change, so polling clients get 304s
+    (and for done/failed jobs the tag is remembered, so a 304 skips serialization too).
+    """
+    task = JOBS.get(job_id)
+    if task is not None and not task.done():
+        done, total = _JOB_PROGRESS.get(job_id, (0, 1))
+        return etag_json_response(request, {
+            "status": "running",
+            "progress": int(100 * done / max(total, 1)),
+            "partial": _JOB_PARTIAL.get(job_id, {}),  # paper_id -> sections generated so far
+        }, _LIVE_CACHE_CONTROL)
+
     job = get_session(job_id)
     if not job:
-        return {"status": "pending", "progress": 0}
-    
+        return etag_json_response(request, {"status": "pending", "progress": 0}, _LIVE_CACHE_CONTROL)
+
+    job_status = job.get("status", "done")
+    version = job.get("updated_at", 0)
+    known = _STATUS_ETAGS.get(job_id)
+    if known is not None and known[0] == version:
+        cached = not_modified(request, known[1])
+        if cached is not None:
+            return cached
+
     # Return with clear structure
-    return {
-        "status": job.get("status", "done"),
-        "progress": 100,
+    response = etag_json_response(request, {
+        "status": job_status,
+        "progress": 0 if job_status == "running" else 100,
         "results": job.get("results"),  # Dict keyed by paper_id
         "paper_count": job.get("paper_count", 1),
         "paper_ids": job.get("paper_ids", [])
-    }
+    }, _LIVE_CACHE_CONTROL if job_status == "running" else "private, max-age=5")
+    if job_status != "running" and "ETag" in response.headers:
+        _STATUS_ETAGS[job_id] = (version, response.headers["ETag"])
+        while len(_STATUS_ETAGS) > _STATUS_ETAGS_MAX:
+            _STATUS_ETAGS.popitem(last=False)
+    return response
 
 
 @router.get("/sessions")
@@ -91,16 +272,14 @@ def sessions():
 
 
 @router.get("/history/list")
-def history_list():
-    sessions = list_sessions()
-    items = []
-    for s in sessions:
-        # Handle both old single-paper and new multi-paper sessions
-        paper_ids = s.get("paper_ids", [s.get("paper_id")] if s.get("paper_id") else [])
-        items.append({
-            "id": s.get("session_id") or s.get("paper_id"),
-            "status": s.get("status", "done"),
-            "paper_count": len(paper_ids),
-            "paper_ids": paper_ids
-        })
-    return {"items": items}
+def history_list(request: Request):
+    items = [
+        {
+            "id": s["session_id"],
+            "status": s["status"],
+            "paper_count": len(s["paper_ids"]),
+            "paper_ids": s["paper_ids"],
+        }
+        for s in list_session_summaries()
+    ]
+    return etag_json_response(request, {"items": items})
@@ -1,18 +1,19 @@
 from fastapi import APIRouter, HTTPException
-from ..utils.security import hash_password, verify_password, gen_token
+from ..utils.security import hash_password, verify_password, needs_rehash, gen_token
 from ..schemas.auth import SignupRequest, LoginRequest, AuthResponse
+from ..utils.kv import KVNamespace
 
 router = APIRouter()
 
-# In-memory users for demo
-USERS: dict[str, dict] = {}
-TOKENS: dict[str, str] = {}
+# Users and tokens live in the shared KV store so any worker can authenticate
+USERS = KVNamespace("users")
+TOKENS = KVNamespace("tokens")
 
 @router.post("/signup", response_model=AuthResponse)
 def signup(payload: SignupRequest):
-    if payload.email in USERS:
+    # insert_new is atomic, so two workers cannot both create the same account
+    if not USERS.insert_new(payload.email, {"password": hash_password(payload.password)}):
         raise HTTPException(status_code=400, detail="Email already exists")
-    USERS[payload.email] = {"password": hash_password(payload.password)}
     token = gen_token()
     TOKENS[token] = payload.email
     return AuthResponse(token=token, email=payload.email)
@@ -22,6 +23,9 @@ def login(payload: LoginRequest):
     user = USERS.get(payload.email)
     if not user or not verify_password(payload.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if needs_rehash(user["password"]):
+        # Upgrade on the one occasion the plaintext is at hand (legacy rows stored it as is)
+        USERS[payload.email] = {**user, "password": hash_password(payload.password)}
     token = gen_token()
     TOKENS[token] = payload.email
     return AuthResponse(token=token, email=payload.email)
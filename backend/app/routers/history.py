@@ -1,10 +1,10 @@
-from fastapi import APIRouter
-from ..utils.session_store import list_sessions
+from fastapi import APIRouter, Request
+from ..utils.session_store import list_session_summaries
+from ..utils.etag import etag_json_response
 
 router = APIRouter()
 
 @router.get("/list")
-def list_history():
-    sessions = list_sessions()
-    items = [{"id": s.get("session_id") or s.get("paper_id"), "status": s.get("status", "done")} for s in sessions]
-    return {"items": items}
+def list_history(request: Request):
+    items = [{"id": s["session_id"], "status": s["status"]} for s in list_session_summaries()]
+    return etag_json_response(request, {"items": items})
@@ -1,32 +1,59 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException
 from ..services.storage import storage
 from ..schemas.paper import UrlIn, PaperOptions
-import requests
+import asyncio
+import httpx
 import os
-import io
-from ..services.ingest import ingest_pdf
+import tempfile
+from ..services.ingest_queue import submit_ingest
 
 router = APIRouter()
 
 # PAPERS now persisted in storage.papers; kept for backwards compat
 PAPERS = storage.papers
 
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# One pooled client for all URL downloads: keep-alive (and HTTP/2 when available) lets
+# repeat fetches from the same host skip the TCP + TLS handshake. Closed on shutdown.
+_client = httpx.AsyncClient(
+    http2=_HTTP2,
+    timeout=30,
+    follow_redirects=True,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+)
+
+
+async def close_http_client() -> None:
+    await _client.aclose()
+
 @router.post("/upload")
-async def upload_pdf(background: BackgroundTasks, file: UploadFile = File(...)):
+async def upload_pdf(file: UploadFile = File(...)):
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
-    paper_id, path = storage.save_upload(file.file, file.filename)
+    # Copying the upload to disk is blocking I/O; keep it off the event loop
+    paper_id, path = await asyncio.to_thread(storage.save_upload, file.file, file.filename)
     # storage.save_upload now persists to index automatically
-    # Start ingestion asynchronously (extract text, embed chunks, upsert to Pinecone)
-    background.add_task(ingest_pdf, paper_id, path, file.filename)
+    # Queue ingestion (extract text, embed chunks, upsert to Pinecone) outside the API process
+    submit_ingest(paper_id, path, file.filename)
     return {"paper_id": paper_id, "filename": file.filename, "ingesting": True}
 
 @router.post("/by-url")
-async def paper_by_url(background: BackgroundTasks, payload: UrlIn):
-    r = requests.get(str(payload.url), timeout=30)
-    r.raise_for_status()
+async def paper_by_url(payload: UrlIn):
     filename = os.path.basename(str(payload.url).split("?")[0]) or "download.pdf"
-    paper_id, path = storage.save_upload(io.BytesIO(r.content), filename)
+    # Stream the download so the event loop keeps serving other requests; small PDFs
+    # stay in memory, larger ones spill to a temp file instead of one big bytes object
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buf:
+        async with _client.stream("GET", str(payload.url)) as r:
+            r.raise_for_status()
+            async for chunk in r.aiter_bytes(65536):
+                buf.write(chunk)
+        buf.seek(0)
+        paper_id, path = await asyncio.to_thread(storage.save_upload, buf, filename)
     # storage.save_upload now persists to index automatically
-    background.add_task(ingest_pdf, paper_id, path, filename)
+    submit_ingest(paper_id, path, filename)
     return {"paper_id": paper_id, "filename": filename, "ingesting": True}
@@ -1,19 +1,21 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from ..utils.kv import KVNamespace
 
 router = APIRouter()
 
 class SettingsIn(BaseModel):
     default_summary_length: str = "medium"
 
-SETTINGS = SettingsIn()
+# Stored in the shared KV store so every worker serves the same settings
+_STORE = KVNamespace("settings")
+_KEY = "app"
 
 @router.get("")
 def get_settings():
-    return SETTINGS
+    return SettingsIn(**_STORE.get(_KEY, {}))
 
 @router.post("")
 def update_settings(payload: SettingsIn):
-    global SETTINGS
-    SETTINGS = payload
-    return SETTINGS
+    _STORE[_KEY] = payload.model_dump()
+    return payload
@@ -38,15 +38,20 @@ class AnalysisRequest(BaseModel):
     )
     options: AnalysisOptions = Field(default_factory=AnalysisOptions)
 
-    @model_validator(mode="after")
-    def _normalize_ids(self):
-        # If only paper_id is provided, convert to paper_ids
-        if (not self.paper_ids or len(self.paper_ids) == 0) and self.paper_id:
-            self.paper_ids = [self.paper_id]
-        # Validate presence
-        if not self.paper_ids or len(self.paper_ids) == 0:
-            raise ValueError("Either paper_ids (list) or paper_id (string) must be provided")
-        return self
+    @model_validator(mode="before")
+    @classmethod
+    def _normalize_ids(cls, data):
+        # Coerce the raw input in one pass, before field validation: a lone paper_id
+        # becomes paper_ids, and paper_id itself is not validated a second time
+        if isinstance(data, dict):
+            paper_ids = data.get("paper_ids")
+            if not paper_ids and data.get("paper_id"):
+                paper_ids = [data["paper_id"]]
+            if not paper_ids:
+                raise ValueError("Either paper_ids (list) or paper_id (string) must be provided")
+            data = {**data, "paper_ids": paper_ids}
+            data.pop("paper_id", None)
+        return data
 
 class Section(BaseModel):
     title: str
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import codecs
+import re
+from typing import Iterator, List
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a ~4 characters per token estimate
+    tiktoken = None
+
+_CHARS_PER_TOKEN = 4
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_encoder_cache = None
+
+
+def _encoder():
+    """Build the tiktoken encoder once; None when tiktoken is not installed."""
+    global _encoder_cache
+    if _encoder_cache is None and tiktoken is not None:
+        _encoder_cache = tiktoken.get_encoding("cl100k_base")
+    return _encoder_cache
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def utf8_len(text: str) -> int:
+    """UTF-8 size of text; ASCII strings (the common case) are measured without encoding."""
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def truncate_utf8(text: str, max_bytes: int) -> str:
+    """Truncate text to at most max_bytes of UTF-8 without encoding more than needed.
+
+    UTF-8 spends 1-4 bytes per character, so a string of <= max_bytes // 4 characters
+    always fits, and at most the first max_bytes characters can survive truncation.
+    """
+    if len(text) * 4 <= max_bytes:
+        return text
+    if text.isascii():
+        return text[:max_bytes]
+    head = text[:max_bytes].encode("utf-8")
+    if len(head) <= max_bytes:
+        return text[:max_bytes]
+    # Back off over continuation bytes (10xxxxxx) to a character start, so the cut never
+    # splits a character and the prefix decodes strictly without a copy of the bytes
+    end = max_bytes
+    while end > 0 and (head[end] & 0xC0) == 0x80:
+        end -= 1
+    return str(memoryview(head)[:end], "utf-8")
+
+
+def split_utf8(text: str, max_bytes: int) -> List[str]:
+    """Split text into consecutive pieces of at most max_bytes of UTF-8 each, cut at the last
+    whitespace in a piece when there is one in its second half. Nothing is dropped."""
+    max_bytes = max(4, max_bytes)
+    pieces: List[str] = []
+    while utf8_len(text) > max_bytes:
+        head = truncate_utf8(text, max_bytes)
+        space = max(head.rfind(" "), head.rfind("\n"))
+        if space > len(head) // 2:
+            head = head[:space + 1]
+        pieces.append(head)
+        text = text[len(head):]
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def _hard_split(text: str, max_tokens: int) -> Iterator[str]:
+    enc = _encoder()
+    if enc is not None:
+        toks = enc.encode(text, disallowed_special=())
+        # A token window can end inside a multi-byte character; decoding windows separately
+        # would turn each split into U+FFFD, so the incremental decoder carries it over
+        dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for i in range(0, len(toks), max_tokens):
+            piece = dec.decode(enc.decode_bytes(toks[i:i + max_tokens]), final=i + max_tokens >= len(toks))
+            if piece:
+                yield piece
+    else:
+        step = max_tokens * _CHARS_PER_TOKEN
+        for i in range(0, len(text), step):
+            yield text[i:i + step]
+
+
+def _pieces(text: str, max_tokens: int) -> Iterator[tuple[str, int]]:
+    """Yield (piece, tokens): paragraphs, or sentences of paragraphs over budget."""
+    for para in text.split("\n\n"):
+        para = para.strip()
+        if not para:
+            continue
+        n = count_tokens(para)
+        if n <= max_tokens:
+            yield para, n
+            continue
+        for sent in _SENTENCE_RE.split(para):
+            n = count_tokens(sent)
+            if n <= max_tokens:
+                yield sent, n
+            else:
+                for part in _hard_split(sent, max_tokens):
+                    yield part, count_tokens(part)
+
+
+def _tail(text: str, overlap: int) -> str:
+    """Last ~overlap tokens of text, starting at a word boundary."""
+    if overlap <= 0:
+        return ""
+    enc = _encoder()
+    if enc is not None:
+        toks = enc.encode(text, disallowed_special=())
+        tail = enc.decode(toks[-overlap:]) if len(toks) > overlap else ""
+    else:
+        span = overlap * _CHARS_PER_TOKEN
+        tail = text[-span:] if len(text) > span else ""
+    space = tail.find(" ")
+    return tail[space + 1:] if space != -1 else tail
+
+
+def chunk_by_tokens(text: str, max_tokens: int, overlap: int = 0) -> List[str]:
+    """Greedily pack paragraphs (then sentences) into chunks of at most max_tokens,
+    starting each chunk after the first with the last ~overlap tokens of the previous one.
+    """
+    max_tokens = max(1, max_tokens)
+    # Short texts (most papers) fit in one chunk; skip the paragraph split and per-piece counts.
+    # Byte-level BPE never yields more tokens than UTF-8 bytes, so that bound needs no encoding.
+    if utf8_len(text) <= max_tokens or count_tokens(text) <= max_tokens:
+        text = text.strip()
+        return [text] if text else []
+    overlap = min(overlap, max_tokens // 2)
+    chunks: List[str] = []
+    cur: List[str] = []
+    cur_tokens = 0
+    for piece, n in _pieces(text, max_tokens):
+        if cur and cur_tokens + n > max_tokens:
+            chunk = "\n\n".join(cur)
+            chunks.append(chunk)
+            carry = _tail(chunk, overlap)
+            carry_tokens = count_tokens(carry) if carry else 0
+            cur, cur_tokens = ([carry], carry_tokens) if carry and carry_tokens + n <= max_tokens else ([], 0)
+        cur.append(piece)
+        cur_tokens += n
+    if cur:
+        chunks.append("\n\n".join(cur))
+    return chunks
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+from ..config import settings
+from ..utils.kv import KVNamespace
+
+# Exact-prompt generation cache: an in-memory LRU in front of the shared SQLite store,
+# so a repeated (model, parts, max_output_tokens, temperature) request skips Gemini.
+# Only deterministic at temperature 0; otherwise a hit replays one earlier sample.
+_MEM: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+_LOCK = threading.Lock()
+_STORE = KVNamespace("gen_cache")
+_COUNTS = {"hits": 0, "misses": 0}
+# Expired rows are only noticed when read again; put() also sweeps them, at most this often
+_SWEEP_INTERVAL = 3600.0
+_last_sweep = 0.0
+
+
+def enabled() -> bool:
+    return settings.gemini_cache_enabled and settings.gemini_cache_ttl > 0
+
+
+def key_for(model: str, parts: List[dict], max_output_tokens: int) -> str:
+    payload = {
+        "model": model,
+        "parts": parts,
+        "max_output_tokens": max_output_tokens,
+        "temperature": settings.gemini_temperature,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _remember(key: str, at: float, text: str) -> None:
+    with _LOCK:
+        _MEM[key] = (at, text)
+        _MEM.move_to_end(key)
+        while len(_MEM) > settings.gemini_cache_size:
+            _MEM.popitem(last=False)
+
+
+def _lookup(key: str) -> str | None:
+    with _LOCK:
+        item = _MEM.get(key)
+        if item is not None:
+            _MEM.move_to_end(key)
+    if item is None:
+        data = _STORE.get(key)
+        if data is None:
+            return None
+        item = (data["at"], data["text"])
+        _remember(key, *item)
+    at, text = item
+    if time.time() - at > settings.gemini_cache_ttl:
+        with _LOCK:
+            _MEM.pop(key, None)
+        _STORE.pop(key, None)
+        return None
+    return text
+
+
+def get(key: str) -> str | None:
+    text = _lookup(key)
+    with _LOCK:
+        _COUNTS["hits" if text is not None else "misses"] += 1
+    return text
+
+
+def stats() -> dict:
+    """Hit/miss counts for this process (the SQLite store itself is shared across workers)."""
+    with _LOCK:
+        total = _COUNTS["hits"] + _COUNTS["misses"]
+        return {
+            "size": len(_MEM),
+            "max_size": settings.gemini_cache_size,
+            **_COUNTS,
+            "hit_rate": (_COUNTS["hits"] / total) if total else 0.0,
+        }
+
+
+def put(key: str, text: str) -> None:
+    if not text:
+        return  # never pin an empty (likely blocked or truncated) response
+    at = time.time()
+    _STORE[key] = {"text": text, "at": at}
+    _remember(key, at, text)
+    _sweep(at)
+
+
+def _sweep(now: float) -> None:
+    global _last_sweep
+    with _LOCK:
+        if now - _last_sweep < _SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+    _STORE.prune("at", now - settings.gemini_cache_ttl)
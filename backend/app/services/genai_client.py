@@ -0,0 +1,21 @@
+from __future__ import annotations
+import google.generativeai as genai
+
+from ..config import settings
+
+# genai.configure() discards the SDK's cached service clients, so calling it per
+# request also drops their gRPC channel and forces a fresh TCP + TLS handshake.
+# Configure once per API key and let every call reuse the same channel.
+_configured_key: str | None = None
+
+
+def configure_genai() -> bool:
+    """Configure the Gemini SDK once; returns False when no API key is set."""
+    global _configured_key
+    api = settings.gemini_api_key
+    if not api:
+        return False
+    if _configured_key != api:
+        genai.configure(api_key=api)
+        _configured_key = api
+    return True
@@ -1,12 +1,35 @@
+import functools
 import os
 from ..config import settings
 from .pdf import extract_text
-from .rag import store
+from .rag import forget_doc, store
+from ..utils.files import write_atomic
 from ..utils.logger import get_logger
+from ..utils.result_cache import file_sha256
 
 logger = get_logger(__name__)
 
 
+# Extracted text keyed by PDF content, so the same PDF uploaded again (new paper_id)
+# is not parsed twice; chunking is deterministic and cheap, so it is not cached
+_TEXT_CACHE_DIR = os.path.join(settings.storage_dir, "cache", "text")
+os.makedirs(_TEXT_CACHE_DIR, exist_ok=True)
+
+
+def _extract_text_cached(pdf_path: str) -> str:
+    cached = os.path.join(_TEXT_CACHE_DIR, f"{file_sha256(pdf_path)}.txt")
+    try:
+        with open(cached, "r", encoding="utf-8") as f:
+            logger.info(f"Extracted text cache hit for {pdf_path}")
+            return f.read()
+    except FileNotFoundError:
+        pass
+    text = extract_text(pdf_path)
+    # Concurrent ingests of the same PDF may both write; each rename is whole
+    write_atomic(cached, text)
+    return text
+
+
 def _text_path(paper_id: str) -> str:
     return os.path.join(settings.storage_dir, f"{paper_id}.txt")
 
@@ -15,8 +38,20 @@ def _marker_path(paper_id: str) -> str:
     return os.path.join(settings.storage_dir, f"{paper_id}.indexed")
 
 
+# Positive is_indexed results; markers are never removed, so a hit stays valid
+_INDEXED: set[str] = set()
+
+
 def is_indexed(paper_id: str) -> bool:
-    return os.path.exists(_marker_path(paper_id))
+    if paper_id in _INDEXED:
+        return True
+    if os.path.exists(_marker_path(paper_id)):
+        # First sighting in this process of an ingest finished elsewhere: results cached while
+        # the paper was still unindexed (or partly indexed) must not outlive it
+        forget_doc(paper_id)
+        _INDEXED.add(paper_id)
+        return True
+    return False
 
 
 def ingest_pdf(paper_id: str, pdf_path: str, filename: str | None = None) -> None:
@@ -27,11 +62,10 @@ def ingest_pdf(paper_id: str, pdf_path: str, filename: str | None = None) -> Non
         if is_indexed(paper_id):
             logger.info(f"Ingest skipped; already indexed: {paper_id}")
             return
-        text = extract_text(pdf_path)
+        text = _extract_text_cached(pdf_path)
         # Save plaintext for later reuse (analysis, QA, etc.)
         os.makedirs(settings.storage_dir, exist_ok=True)
-        with open(_text_path(paper_id), "w", encoding="utf-8") as f:
-            f.write(text)
+        write_atomic(_text_path(paper_id), text)
         # Index chunks into Pinecone
         store.add_document(doc_id=paper_id, text=text, extra_meta={
             "doc_id": paper_id,
@@ -41,16 +75,24 @@ def ingest_pdf(paper_id: str, pdf_path: str, filename: str | None = None) -> Non
         # Write marker
         with open(_marker_path(paper_id), "w") as f:
             f.write("ok")
+        _INDEXED.add(paper_id)
         logger.info(f"Ingest completed: {paper_id}")
     except Exception as e:
         logger.error(f"Ingest failed for {paper_id}: {e}")
         raise
 
 
+@functools.lru_cache(maxsize=64)
+def _get_text_cached(paper_id: str, mtime_ns: int, size: int) -> str:
+    # mtime/size are part of the key so a rewritten text file is read again
+    with open(_text_path(paper_id), "r", encoding="utf-8") as f:
+        return f.read()
+
+
 def get_text(paper_id: str) -> str:
     """Return stored plaintext for the given paper_id if available, else empty string."""
-    p = _text_path(paper_id)
-    if os.path.exists(p):
-        with open(p, "r", encoding="utf-8") as f:
-            return f.read()
-    return ""
+    try:
+        st = os.stat(_text_path(paper_id))
+    except FileNotFoundError:
+        return ""
+    return _get_text_cached(paper_id, st.st_mtime_ns, st.st_size)
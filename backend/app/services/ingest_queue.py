@@ -0,0 +1,44 @@
+from __future__ import annotations
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from ..config import settings
+from ..celery_app import ingest_pdf_task
+from ..utils.logger import get_logger
+from .ingest import ingest_pdf
+from .rag import forget_doc
+
+logger = get_logger(__name__)
+
+# Without a Celery broker, ingestion runs in a small process pool: PDF parsing and
+# chunking are CPU-bound and would otherwise compete with the event loop for the GIL.
+# "spawn" keeps children from inheriting the parent's gRPC/HTTP client state.
+_POOL: ProcessPoolExecutor | None = None
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(
+            max_workers=settings.ingest_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _POOL
+
+
+def _on_done(paper_id: str, fut: Future) -> None:
+    err = fut.exception()
+    if err is not None:
+        logger.error(f"Queued ingest failed for {paper_id}: {err}")
+        return
+    # The child's add_batch invalidated only its own caches; drop this process's copies
+    forget_doc(paper_id)
+
+
+def submit_ingest(paper_id: str, pdf_path: str, filename: str | None = None) -> None:
+    """Queue ingestion of an uploaded PDF (Celery when configured, else the process pool)."""
+    if ingest_pdf_task is not None:
+        ingest_pdf_task.delay(paper_id, pdf_path, filename)
+        return
+    fut = _pool().submit(ingest_pdf, paper_id, pdf_path, filename)
+    fut.add_done_callback(lambda f: _on_done(paper_id, f))
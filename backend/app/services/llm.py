@@ -1,98 +1,374 @@
 from __future__ import annotations
-from typing import List, Optional, Dict
+from typing import Dict, Iterable, Iterator, List, Optional
+import asyncio
+import functools
+import itertools
+import json
+import logging
+import random
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
+from google.api_core.exceptions import InvalidArgument
+from google.generativeai.types import BlockedPromptException
 
 from ..config import settings
 from ..utils.logger import get_logger, track_api_call
+from .genai_client import configure_genai
+from .chunking import chunk_by_tokens, split_utf8, truncate_utf8, utf8_len
+from . import gen_cache, rate_limit, semantic_cache
 
 logger = get_logger(__name__)
 
-# Track total API calls across all requests
-_api_call_counter = 0
+# Ids for Gemini calls across all requests; next() on a count is atomic, "+= 1" on a global is not
+_api_call_ids = itertools.count(1)
 
+# Bounds in-flight async generations process-wide so chunk fan-out (and concurrent
+# papers) stays within the Gemini quota; retry back-off sleeps do not hold a slot
+_GEN_SEM = asyncio.Semaphore(settings.gemini_concurrency)
+# Sent only when GEMINI_TEMPERATURE is set; otherwise the model's default applies
+_TEMPERATURE = {"temperature": settings.gemini_temperature} if settings.gemini_temperature is not None else {}
 
-def _model() -> "genai.GenerativeModel":
-    if not settings.gemini_api_key:
-        raise RuntimeError("GEMINI_API_KEY not configured")
-    genai.configure(api_key=settings.gemini_api_key)
+# Generation tasks by (event loop, cache key) while they run; see _gen_with_retry_async
+_INFLIGHT: Dict[tuple, "asyncio.Task[str]"] = {}
+
+
+@functools.lru_cache(maxsize=4)
+def _model_named(name: str) -> "genai.GenerativeModel":
+    # GenerativeModel holds no per-request state, so one instance per name is reused
+    return genai.GenerativeModel(name)
+
+
+def _model_name() -> str:
     # Use gemini-pro as default (stable model name)
     # Valid options: "gemini-pro", "gemini-1.5-flash", "gemini-1.5-pro-latest"
-    name = settings.gemini_model or "gemini-pro"
-    return genai.GenerativeModel(name)
+    return settings.gemini_model or "gemini-pro"
+
+
+def _model() -> "genai.GenerativeModel":
+    if not configure_genai():
+        raise RuntimeError("GEMINI_API_KEY not configured")
+    return _model_named(_model_name())
+
+
+def _cache_key(parts: List[dict], max_output_tokens: int) -> str | None:
+    """Response-cache key for this request, or None when the cache is disabled."""
+    if not gen_cache.enabled():
+        return None
+    return gen_cache.key_for(_model_name(), parts, max_output_tokens)
+
 
+def _semantic_bucket(parts: List[dict], max_output_tokens: int) -> "semantic_cache.Bucket":
+    return (_model_name(), max_output_tokens, settings.gemini_temperature, semantic_cache.task_key(parts))
 
-def _chunk_bytes(s: str, max_bytes: int) -> List[str]:
-    b = s.encode("utf-8")
-    out: List[str] = []
-    for i in range(0, len(b), max_bytes):
-        out.append(b[i : i + max_bytes].decode("utf-8", errors="ignore"))
-    return [x for x in out if x.strip()]
+
+def _semantic_lookup(parts: List[dict], max_output_tokens: int) -> tuple[str | None, "semantic_cache.Handle | None"]:
+    """(similar cached response or None, handle to store this request's response under)."""
+    if not semantic_cache.enabled():
+        return None, None
+    vec = semantic_cache.embed(semantic_cache.probe_text(parts))
+    if vec is None:
+        return None, None
+    bucket = _semantic_bucket(parts, max_output_tokens)
+    return semantic_cache.lookup(bucket, vec), (bucket, vec)
+
+
+async def _asemantic_lookup(parts: List[dict], max_output_tokens: int) -> tuple[str | None, "semantic_cache.Handle | None"]:
+    if not semantic_cache.enabled():
+        return None, None
+    vec = await semantic_cache.aembed(semantic_cache.probe_text(parts))
+    if vec is None:
+        return None, None
+    bucket = _semantic_bucket(parts, max_output_tokens)
+    return await asyncio.to_thread(semantic_cache.lookup, bucket, vec), (bucket, vec)
 
 
 def _calculate_safe_chunk_size(prompt: str, context: str, max_total: int = 30000) -> int:
     """Calculate safe chunk size based on prompt and context to avoid token overflow."""
-    prompt_bytes = len(prompt.encode('utf-8'))
-    context_bytes = len(context.encode('utf-8'))
+    prompt_bytes = utf8_len(prompt)
+    context_bytes = utf8_len(context)
     safety_margin = 2000  # for tokenization overhead and response
     available = max_total - prompt_bytes - context_bytes - safety_margin
     return max(1000, available)  # minimum 1KB chunk
 
 
-def _truncate_bytes(text: str, max_bytes: int) -> str:
-    """Truncate text to max_bytes, ensuring valid UTF-8."""
-    b = text.encode('utf-8')
-    if len(b) <= max_bytes:
-        return text
-    return b[:max_bytes].decode('utf-8', errors='ignore')
+def _retry_delay(e: Exception, attempt: int, max_retries: int, backoff: float) -> float:
+    """Return how long to wait before the next generation attempt (0 means don't wait)."""
+    if attempt >= max_retries:
+        logger.warning(f"[RETRY] Generation attempt {attempt}/{max_retries} failed: {e}")
+        return 0.0
+    error_str = str(e)
+
+    # Rate limit error (429): honour the retry delay suggested by the API if it gave one
+    if "429" in error_str:
+        retry_delay = rate_limit.server_delay(error_str)
+        if retry_delay is not None:
+            logger.warning(f"[RETRY] Rate limit hit on attempt {attempt}/{max_retries}. Waiting {retry_delay}s as suggested by API...")
+            rate_limit.cool_down(retry_delay + 1)  # Add 1s buffer; other callers wait it out too
+            return retry_delay + 1
+
+    logger.warning(f"[RETRY] Generation attempt {attempt}/{max_retries} failed: {e}")
+    # Exponential back-off with jitter so concurrent chunk calls don't retry in lockstep
+    delay = backoff * (2 ** (attempt - 1)) + random.uniform(0, 0.5 * backoff)
+    if "429" in error_str:
+        rate_limit.cool_down(delay)
+    return delay
+
+
+def _raise_if_blocked(resp) -> None:
+    """Turn a safety-blocked prompt into BlockedPromptException (one of the _NO_RETRY errors)."""
+    feedback = getattr(resp, "prompt_feedback", None)
+    if feedback is not None and feedback.block_reason:
+        raise BlockedPromptException(feedback)
+
+
+# Errors that fail identically on every attempt: raised at once instead of retried
+_NO_RETRY = (BlockedPromptException, InvalidArgument)
+
+
+def _preflight(parts: List[dict], call_info: str) -> int:
+    """Return the request's input size in bytes, raising ValueError when it is over budget."""
+    total_bytes = sum(utf8_len(str(p.get('text', ''))) for p in parts)
+    limit = settings.gemini_max_request_bytes
+    if limit and total_bytes > limit:
+        logger.warning(f"[PREFLIGHT] Request {call_info} is {total_bytes} bytes, over the {limit} byte limit; not sending")
+        raise ValueError(f"Gemini request of {total_bytes} bytes exceeds GEMINI_MAX_REQUEST_BYTES={limit}; re-chunk the input")
+    return total_bytes
+
+
+def _log_call_start(total_bytes: int, max_output_tokens: int, call_info: str) -> int:
+    """Assign the call its id and log what is being sent; returns the id."""
+    call_id = next(_api_call_ids)
+
+    if not logger.isEnabledFor(logging.INFO):
+        return call_id
+    logger.info(f"Making Gemini API call #{call_id} {call_info}")
+    logger.info(f"Input size: ~{total_bytes} bytes, Output tokens requested: {max_output_tokens}")
+    return call_id
 
 
 @track_api_call("GEMINI_GENERATION")
 def _gen_with_retry(parts: List[dict], max_output_tokens: int = 1024, call_info: str = "") -> str:
-    global _api_call_counter
-    _api_call_counter += 1
-    
+    key = _cache_key(parts, max_output_tokens)
+    if key is not None:
+        cached = gen_cache.get(key)
+        if cached is not None:
+            logger.info(f"Generation cache hit {call_info} (hit rate {gen_cache.stats()['hit_rate']:.0%})")
+            return cached
+    total_bytes = _preflight(parts, call_info)
+    similar, sem = _semantic_lookup(parts, max_output_tokens)
+    if similar is not None:
+        return similar
+
     max_retries = int(getattr(settings, "gemini_max_retries", 3))
     backoff = float(getattr(settings, "gemini_retry_backoff", 1.0))
     last_err: Exception | None = None
-    
-    # Calculate token estimates for logging
-    total_bytes = sum(len(str(p.get('text', '')).encode('utf-8')) for p in parts)
-    logger.info(f"Making Gemini API call #{_api_call_counter} {call_info}")
-    logger.info(f"Input size: ~{total_bytes} bytes, Output tokens requested: {max_output_tokens}")
-    
-    start_time = time.time()
+
+    call_id = _log_call_start(total_bytes, max_output_tokens, call_info)
+    model = _model()  # resolved once; every retry reuses the same instance
+    start_time = time.perf_counter()
     
     for attempt in range(1, max_retries + 1):
+        wait = rate_limit.reserve()
+        if wait > 0:
+            time.sleep(wait)
         try:
-            resp = _model().generate_content(
+            resp = model.generate_content(
                 parts,
-                generation_config={"max_output_tokens": max_output_tokens}
+                generation_config={"max_output_tokens": max_output_tokens, **_TEMPERATURE}
             )
-            duration = time.time() - start_time
-            logger.info(f"API call completed in {duration:.2f}s. Total calls so far: {_api_call_counter}")
-            return (resp.text or "").strip()
+            _raise_if_blocked(resp)
+            duration = time.perf_counter() - start_time
+            logger.info(f"API call #{call_id} completed in {duration:.2f}s")
+            text = (resp.text or "").strip()
+            if key is not None:
+                gen_cache.put(key, text)
+            if sem is not None:
+                semantic_cache.store(sem, text)
+            return text
+        except _NO_RETRY:
+            raise
         except Exception as e:
             last_err = e
-            error_str = str(e)
-            
-            # Check if it's a rate limit error (429) with retry delay
-            if "429" in error_str and "retry_delay" in error_str:
-                # Extract retry delay from error message if possible
-                delay_match = re.search(r'retry in (\d+\.?\d*)s', error_str)
-                if delay_match:
-                    retry_delay = float(delay_match.group(1))
-                    logger.warning(f"[RETRY] Rate limit hit on attempt {attempt}/{max_retries}. Waiting {retry_delay}s as suggested by API...")
-                    time.sleep(retry_delay + 1)  # Add 1s buffer
-                    continue
-            
-            logger.warning(f"[RETRY] Generation attempt {attempt}/{max_retries} failed: {e}")
-            if attempt < max_retries:
-                time.sleep(backoff * attempt)
+            delay = _retry_delay(e, attempt, max_retries, backoff)
+            if delay:
+                time.sleep(delay)
+    raise RuntimeError(f"Generation failed after {max_retries} retries: {last_err}")
+
+
+# Shared by every sync chunk fan-out, so concurrent callers together stay within
+# gemini_concurrency blocking calls (the sync counterpart of _GEN_SEM)
+_GEN_POOL = ThreadPoolExecutor(max_workers=max(1, settings.gemini_concurrency), thread_name_prefix="gemini-gen")
+
+
+def _gen_many(parts_list: List[List[dict]], max_output_tokens: int) -> List[str]:
+    """Run one blocking generation per chunk concurrently on _GEN_POOL, returning
+    outputs in chunk order."""
+    if len(parts_list) <= 1:
+        return [_gen_with_retry(parts, max_output_tokens=max_output_tokens) for parts in parts_list]
+    return list(_GEN_POOL.map(lambda parts: _gen_with_retry(parts, max_output_tokens=max_output_tokens), parts_list))
+
+
+@track_api_call("GEMINI_GENERATION_ASYNC")
+async def _gen_with_retry_async(parts: List[dict], max_output_tokens: int = 1024, call_info: str = "") -> str:
+    """Async twin of _gen_with_retry; lets independent calls share one event loop."""
+    key = _cache_key(parts, max_output_tokens)
+    if key is not None:
+        cached = await asyncio.to_thread(gen_cache.get, key)
+        if cached is not None:
+            logger.info(f"Generation cache hit {call_info} (hit rate {gen_cache.stats()['hit_rate']:.0%})")
+            return cached
+        # An identical request already running on this loop (e.g. asummarize and acritique
+        # gathered over one paper) is awaited rather than sent a second time
+        flight = (asyncio.get_running_loop(), key)
+        task = _INFLIGHT.get(flight)
+        if task is None:
+            task = asyncio.ensure_future(_generate_async(parts, max_output_tokens, call_info, key))
+            _INFLIGHT[flight] = task
+            task.add_done_callback(lambda _: _INFLIGHT.pop(flight, None))
+        else:
+            logger.info(f"Joining in-flight generation {call_info}")
+        # shield: one caller being cancelled must not cancel the call the others await
+        return await asyncio.shield(task)
+    return await _generate_async(parts, max_output_tokens, call_info, None)
+
+
+async def _generate_async(parts: List[dict], max_output_tokens: int, call_info: str, key: str | None) -> str:
+    total_bytes = _preflight(parts, call_info)
+    similar, sem = await _asemantic_lookup(parts, max_output_tokens)
+    if similar is not None:
+        return similar
+
+    max_retries = int(getattr(settings, "gemini_max_retries", 3))
+    backoff = float(getattr(settings, "gemini_retry_backoff", 1.0))
+    last_err: Exception | None = None
+
+    call_id = _log_call_start(total_bytes, max_output_tokens, call_info)
+    model = _model()
+    start_time = time.perf_counter()
+
+    for attempt in range(1, max_retries + 1):
+        wait = rate_limit.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            async with _GEN_SEM:
+                resp = await model.generate_content_async(
+                    parts,
+                    generation_config={"max_output_tokens": max_output_tokens, **_TEMPERATURE}
+                )
+            _raise_if_blocked(resp)
+            duration = time.perf_counter() - start_time
+            logger.info(f"API call #{call_id} completed in {duration:.2f}s")
+            text = (resp.text or "").strip()
+            if key is not None:
+                await asyncio.to_thread(gen_cache.put, key, text)
+            if sem is not None:
+                await asyncio.to_thread(semantic_cache.store, sem, text)
+            return text
+        except _NO_RETRY:
+            raise
+        except Exception as e:
+            last_err = e
+            delay = _retry_delay(e, attempt, max_retries, backoff)
+            if delay:
+                await asyncio.sleep(delay)
     raise RuntimeError(f"Generation failed after {max_retries} retries: {last_err}")
 
 
+async def _gen_stream_async(parts: List[dict], max_output_tokens: int = 1024, call_info: str = ""):
+    """Yield response text as Gemini streams it.
+
+    Retries only cover opening the stream; once text has been yielded a failure
+    propagates to the caller, since the partial output cannot be taken back.
+    """
+    key = _cache_key(parts, max_output_tokens)
+    if key is not None:
+        cached = await asyncio.to_thread(gen_cache.get, key)
+        if cached is not None:
+            logger.info(f"Generation cache hit {call_info} (hit rate {gen_cache.stats()['hit_rate']:.0%})")
+            yield cached
+            return
+    total_bytes = _preflight(parts, call_info)
+    similar, sem = await _asemantic_lookup(parts, max_output_tokens)
+    if similar is not None:
+        yield similar
+        return
+
+    max_retries = int(getattr(settings, "gemini_max_retries", 3))
+    backoff = float(getattr(settings, "gemini_retry_backoff", 1.0))
+    last_err: Exception | None = None
+
+    call_id = _log_call_start(total_bytes, max_output_tokens, call_info)
+    model = _model()
+    start_time = time.perf_counter()
+
+    for attempt in range(1, max_retries + 1):
+        wait = rate_limit.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        # Like _generate_async, a slot is held only while a call is open (not during retry
+        # sleeps), but here it stays held until the stream is drained or abandoned below
+        await _GEN_SEM.acquire()
+        try:
+            resp = await model.generate_content_async(
+                parts,
+                generation_config={"max_output_tokens": max_output_tokens, **_TEMPERATURE},
+                stream=True,
+            )
+            _raise_if_blocked(resp)
+            break
+        except _NO_RETRY:
+            _GEN_SEM.release()
+            raise
+        except Exception as e:
+            _GEN_SEM.release()
+            last_err = e
+            delay = _retry_delay(e, attempt, max_retries, backoff)
+            if delay:
+                await asyncio.sleep(delay)
+        except BaseException:
+            # Cancellation (a client leaving /analysis/stream) must not leak the slot either
+            _GEN_SEM.release()
+            raise
+    else:
+        raise RuntimeError(f"Generation failed after {max_retries} retries: {last_err}")
+
+    try:
+        logger.info(f"API stream opened in {time.perf_counter() - start_time:.2f}s")
+        pieces: List[str] = []
+        async for chunk in resp:
+            try:
+                piece = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. a trailing finish_reason) carry nothing to emit
+                continue
+            if piece:
+                pieces.append(piece)
+                yield piece
+    finally:
+        _GEN_SEM.release()
+    # Only a stream that ran to completion is cached
+    full_text = "".join(pieces).strip()
+    if key is not None:
+        await asyncio.to_thread(gen_cache.put, key, full_text)
+    if sem is not None:
+        await asyncio.to_thread(semantic_cache.store, sem, full_text)
+    logger.info(f"API stream #{call_id} completed in {time.perf_counter() - start_time:.2f}s")
+
+
+# Patterns used by the response parsers, compiled once at import
+_SECTION_DELIM_RE = re.compile(r"===\s*([A-Za-z][A-Za-z\s/]+)\s*===")
+# Markdown "## Name" / "### Name" headings. Both heading patterns start with a literal so
+# the regex engine can jump between candidates; line-start is checked in _md_headings.
+# A trailing \r is allowed, since $ does not match before the \r of a CRLF line end.
+_MD_HEADING_RE = re.compile(r"##(?!##)#?[ \t]*([A-Za-z][A-Za-z \t/]+)[ \t\r]*$", re.MULTILINE)
+_LIST_SECTIONS = frozenset({"key_findings", "citations"})
+_YEAR_RE = re.compile(r"\((?:19|20)\d{2}\)|\[(?:19|20)\d{2}\]")
+_BULLET_MARKS = ("-", "•", "*")
+
+
 def _parse_structured_response(response_text: str) -> Dict[str, any]:
     """Parse structured response with section delimiters into a dict.
 
@@ -109,54 +385,16 @@ def _parse_structured_response(response_text: str) -> Dict[str, any]:
     text = response_text or ""
 
     try:
-        parsed_any = False
-
-        # 1) Try strict === SECTION === delimiters
-        strict_parts = re.split(r"===\s*([A-Za-z][A-Za-z\s/]+)\s*===", text)
-        if len(strict_parts) > 1:
-            parsed_any = True
-            for i in range(1, len(strict_parts), 2):
-                if i + 1 >= len(strict_parts):
-                    break
-                name = strict_parts[i].strip().upper()
-                content = strict_parts[i + 1].strip()
-                if "SUMMARY" in name:
-                    sections["summary"] = content
-                elif "CRITIQUE" in name or "FEEDBACK" in name:
-                    sections["critique"] = content
-                elif "KEY" in name and "FINDING" in name:
-                    sections["key_findings"] = _extract_bullets(content)
-                elif "CITATION" in name or "REFERENCE" in name:
-                    sections["citations"] = _extract_bullets(content)
-
-        # 2) If strict failed or incomplete, try Markdown headings ## Section
-        if not parsed_any or not (sections["summary"] and (sections["critique"] or sections["key_findings"] or sections["citations"])):
-            # Build a map of heading -> content using markdown style
-            md_regex = re.compile(r"^\s{0,3}#{2,3}\s*([A-Za-z][A-Za-z\s/]+)\s*$", re.MULTILINE)
-            spans = []
-            for m in md_regex.finditer(text):
-                spans.append((m.start(), m.end(), m.group(1).strip().upper()))
-            # Append end sentinel
-            spans.append((len(text), len(text), "END"))
-
-            for i in range(len(spans) - 1):
-                start, _, name = spans[i]
-                next_start, _, _ = spans[i + 1]
-                # Extract heading line to find content start
-                heading_line_end = text.find("\n", start)
-                if heading_line_end == -1:
-                    heading_line_end = start
-                content = text[heading_line_end:next_start].strip()
-                if not content:
-                    continue
-                if "SUMMARY" in name and not sections["summary"]:
-                    sections["summary"] = content
-                elif ("CRITIQUE" in name or "FEEDBACK" in name) and not sections["critique"]:
-                    sections["critique"] = content
-                elif "KEY" in name and "FINDING" in name and not sections["key_findings"]:
-                    sections["key_findings"] = _extract_bullets(content)
-                elif ("CITATION" in name or "REFERENCE" in name) and not sections["citations"]:
-                    sections["citations"] = _extract_bullets(content)
+        # 1) Strict === SECTION === delimiters (a repeated section overrides the earlier one)
+        strict = list(_SECTION_DELIM_RE.finditer(text))
+        for (key, content) in _heading_sections(text, strict):
+            sections[key] = content
+
+        # 2) If strict failed or incomplete, fill gaps from Markdown headings ## Section
+        if not strict or not (sections["summary"] and (sections["critique"] or sections["key_findings"] or sections["citations"])):
+            for (key, content) in _heading_sections(text, _md_headings(text)):
+                if content and not sections[key]:
+                    sections[key] = content
 
         # 3) Final fallback heuristics
         if not sections["key_findings"]:
@@ -165,14 +403,7 @@ def _parse_structured_response(response_text: str) -> Dict[str, any]:
 
         if not sections["citations"]:
             # Look for lines containing typical citation patterns (year in parentheses/brackets)
-            citation_like = []
-            for line in text.splitlines():
-                lt = line.strip()
-                if not lt:
-                    continue
-                if re.search(r"\((19|20)\d{2}\)|\[(19|20)\d{2}\]", lt):
-                    citation_like.append(lt.strip("- •*\t "))
-            sections["citations"] = citation_like[:5]
+            sections["citations"] = _citation_lines(text, 5)
 
         # 4) If still nothing parsed, treat entire text as summary
         if not sections["summary"] and not sections["critique"]:
@@ -186,25 +417,204 @@ def _parse_structured_response(response_text: str) -> Dict[str, any]:
     return sections
 
 
+def _citation_lines(text: str, limit: int) -> List[str]:
+    """First `limit` lines containing a (19xx)/[20xx]-style year, bullet marks stripped.
+
+    Scans for the year and widens each hit to its line, so lines without one are never
+    split out or searched individually.
+    """
+    found: List[str] = []
+    pos = 0
+    while len(found) < limit:
+        m = _YEAR_RE.search(text, pos)
+        if m is None:
+            break
+        start = text.rfind("\n", 0, m.start()) + 1
+        end = text.find("\n", m.end())
+        if end == -1:
+            end = len(text)
+        found.append(text[start:end].strip().strip("- •*\t "))
+        pos = end
+    return found
+
+
+def _md_headings(text: str) -> Iterator["re.Match[str]"]:
+    """Markdown heading matches that start a line (after at most 3 spaces/tabs)."""
+    for m in _MD_HEADING_RE.finditer(text):
+        # Only the 4 characters before the match can decide it, so never scan the whole line
+        start = m.start()
+        indent = text[max(0, start - 4):start]
+        nl = indent.rfind("\n")
+        if nl != -1 or start < 4:
+            if not indent[nl + 1:].strip(" \t"):
+                yield m
+
+
+def _heading_sections(text: str, headings: Iterable["re.Match[str]"]):
+    """Yield (key, content) for each recognised heading; content runs to the next heading."""
+    prev = None
+    for m in itertools.chain(headings, (None,)):
+        if prev is not None:
+            key = _section_key(prev.group(1))
+            if key is not None:
+                content = text[prev.end():m.start() if m is not None else len(text)].strip()
+                yield key, (_extract_bullets(content) if key in _LIST_SECTIONS else content)
+        prev = m
+
+
 def _extract_bullets(s: str) -> list[str]:
-    lines = s.splitlines()
-    bullets = [
-        l.strip("- •*\t ")
-        for l in lines
-        if l.strip() and (l.lstrip().startswith("-") or l.lstrip().startswith("•") or l.lstrip().startswith("*"))
-    ]
+    bullets = []
+    for l in s.splitlines():
+        t = l.lstrip()
+        if t.startswith(_BULLET_MARKS):
+            bullets.append(t.strip("- •*\t "))
     return bullets
 
 
+def _strip_bullet_lines(outputs: List[str]) -> List[str]:
+    """Non-blank lines across outputs with bullet markers stripped from both ends."""
+    return [l.strip("- •\t ") for text_out in outputs for l in text_out.splitlines() if l.strip()]
+
+
+def _dedupe_lines(lines: List[str], limit: int) -> List[str]:
+    """First `limit` lines that are distinct after case-folding and whitespace collapsing,
+    in order. Plain str keys: CPython caches str hashes, so membership is already cheap."""
+    seen: set[str] = set()
+    uniq: List[str] = []
+    for l in lines:
+        key = " ".join(l.casefold().split())
+        if key and key not in seen:
+            seen.add(key)
+            uniq.append(l)
+            if len(uniq) == limit:
+                break
+    return uniq
+
+
+@functools.lru_cache(maxsize=128)
+def _section_key(name: str) -> str | None:
+    """Map a section heading name to its result key (memoized; models reuse the same few names)."""
+    name = name.strip().upper()
+    if "SUMMARY" in name:
+        return "summary"
+    if "CRITIQUE" in name or "FEEDBACK" in name:
+        return "critique"
+    if "KEY" in name and "FINDING" in name:
+        return "key_findings"
+    if "CITATION" in name or "REFERENCE" in name:
+        return "citations"
+    return None
+
+
+class _SectionStream:
+    """Split streamed text into sections as their "=== NAME ===" delimiters arrive.
+
+    A section is complete once the next delimiter has been received in full.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._scan_from = 0
+        self._current: tuple[str, int] | None = None
+
+    def feed(self, piece: str) -> List[tuple[str, str]]:
+        self.text += piece
+        done = []
+        for m in _SECTION_DELIM_RE.finditer(self.text, self._scan_from):
+            if self._current is not None:
+                name, start = self._current
+                done.append((name, self.text[start:m.start()].strip()))
+            self._current = (m.group(1), m.end())
+            self._scan_from = m.end()
+        return done
+
+    def finish(self) -> List[tuple[str, str]]:
+        if self._current is None:
+            return []
+        name, start = self._current
+        self._current = None
+        return [(name, self.text[start:].strip())]
+
+
+# Bytes reserved for a per-task instruction when sizing generation chunks; every task
+# prompt in LLMClient fits, which keeps their chunk budgets (and chunk lists) identical
+_INSTRUCTION_ALLOWANCE = 1024
+
+
+@functools.lru_cache(maxsize=8)
+def _shared_chunks(text: str, max_tokens: int, overlap: int) -> tuple[str, ...]:
+    """chunk_by_tokens, memoized so summarize/critique/key_findings on one paper chunk it once."""
+    return tuple(chunk_by_tokens(text, max_tokens, overlap))
+
+
+# Instructions for the consolidated analysis, identical on every call so requests share a
+# byte-for-byte prefix that Gemini's prefix (implicit context) caching can reuse; the style,
+# RAG context and paper text follow in a second part
+_ANALYSIS_INSTRUCTIONS = """You are analyzing a research paper. The analysis style, context and paper content follow these instructions.
+
+Please provide your analysis in this EXACT format with clear delimiters:
+
+=== SUMMARY ===
+Provide a summary, written in the Analysis Style given below, covering:
+- Main research question/objective
+- Methodology approach
+- Key results and findings
+- Main contributions to the field
+
+=== CRITIQUE ===
+Provide critical analysis addressing:
+- Strengths: What does this paper do well? Novel contributions?
+- Limitations: What are the methodological limitations or assumptions?
+- Validity: How strong is the evidence? Any concerns about conclusions?
+- Impact: Significance and potential influence of this work
+
+=== KEY FINDINGS ===
+List 3-5 most important findings as bullet points:
+- [Most important discovery or result]
+- [Second key finding]
+- [Additional findings...]
+
+Focus on concrete, specific findings rather than general statements.
+
+=== CITATIONS ===
+List the most important references cited (up to 5):
+- [Key citation 1 - Author(s), Year, Brief relevance]
+- [Key citation 2]
+- ...
+
+Only include citations that are central to understanding this work.
+"""
+
+
+# Section specs for the consolidated gap-filling prompt (see LLMClient.fill_missing)
+_FILL_SPECS = {
+    "critique": "a balanced critique (string) covering methodology, assumptions, limitations and potential improvements",
+    "key_findings": "the 5 most important key findings (array of short strings)",
+    "citations": "up to 5 important citations mentioned in the paper (array of single-line strings: authors, year, title if present)",
+}
+
+
+def _parse_json_object(response_text: str) -> dict:
+    """Extract the first JSON object from a model response, tolerating ```json fences and chatter."""
+    text = (response_text or "").strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        logger.warning(f"Could not parse JSON response: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
 class LLMClient:
     def extract_key_content(self, text: str, context: str = "", max_output_tokens: int = 512) -> str:
         """
         Phase 1: Extract the most important content from the entire paper.
         Reduces large papers to ~10-15% of original size for efficient analysis.
         """
-        global _api_call_counter
-        
-        text_bytes = len(text.encode('utf-8'))
+        text_bytes = utf8_len(text)
         logger.info(f"[EXTRACT_START] Extracting key content from {text_bytes} bytes of text")
         
         prompt = f"""You are analyzing a research paper. Extract ONLY the most important content for comprehensive analysis.
@@ -240,7 +650,7 @@ Target length: 5,000-10,000 characters of the most information-dense content."""
                 call_info="(Key Content Extraction)"
             )
             
-            extracted_bytes = len(extracted.encode('utf-8'))
+            extracted_bytes = utf8_len(extracted)
             reduction_pct = (extracted_bytes / text_bytes) * 100 if text_bytes > 0 else 0
             
             logger.info(f"[EXTRACT_COMPLETE] Extraction successful")
@@ -253,38 +663,24 @@ Target length: 5,000-10,000 characters of the most information-dense content."""
             logger.warning("Falling back to first 10KB of text")
             return text[:10000]
     
-    def analyze_all_sections(
-        self, 
-        text: str, 
-        style: str = "medium", 
-        context: str = "", 
-        paper_id: str | None = None
-    ) -> Dict[str, any]:
-        """
-        OPTIMIZED: Single-pass analysis without extraction step for most papers.
-        """
-        global _api_call_counter
-        analysis_start = time.time()
-        initial_call_count = _api_call_counter
-
+    def _all_sections_parts(self, text: str, style: str, context: str, paper_id: str | None) -> List[dict]:
+        """Build the single consolidated prompt shared by the sync and async analysis paths."""
         logger.info(f"[CONSOLIDATED_ANALYSIS_START] Beginning consolidated analysis for paper_id={paper_id}, style='{style}'")
 
-        text_size = len(text.encode('utf-8'))
-        logger.info(f"Paper text size: {text_size} bytes")
+        logger.info(f"Paper text size: {len(text)} chars")
 
         # OPTIMIZATION 1: Remove extraction step - use full text directly
-        # Only truncate if exceeds absolute max
+        # Only truncate if exceeds absolute max. truncate_utf8 returns text itself when it
+        # fits and otherwise encodes only a prefix, so a long paper is never encoded whole.
         max_input = settings.gemini_max_total_bytes
-        if text_size > max_input:
-            logger.warning(f"Paper exceeds max input ({text_size} > {max_input}), truncating")
-            text_to_analyze = _truncate_bytes(text, max_input)
-        else:
-            text_to_analyze = text
+        text_to_analyze = truncate_utf8(text, max_input)
+        if text_to_analyze is not text:
+            logger.warning(f"Paper exceeds max input ({len(text)} chars > {max_input} bytes), truncating")
         
         logger.info(f"[STRATEGY] Direct analysis without extraction (saved 1 API call)")
 
         # OPTIMIZATION 2: Truncate context safely
-        safe_context = _truncate_bytes(context, settings.gemini_max_context_bytes)
+        safe_context = truncate_utf8(context, settings.gemini_max_context_bytes)
         
         # Map style to description
         style_map = {
@@ -298,9 +694,8 @@ Target length: 5,000-10,000 characters of the most information-dense content."""
         # OPTIMIZATION 3: Add paper identification to prompt
         paper_identifier = f"\n**Paper ID**: {paper_id}\n" if paper_id else ""
 
-        # Build comprehensive prompt
-        prompt = f"""You are analyzing a research paper.
-{paper_identifier}
+        # Static instructions first, paper-specific content last (see _ANALYSIS_INSTRUCTIONS)
+        variable = f"""{paper_identifier}
 **Analysis Style**: {style_desc}
 
 **Context from paper:**
@@ -309,148 +704,391 @@ Target length: 5,000-10,000 characters of the most information-dense content."""
 **Paper Content:**
 {text_to_analyze}
 
-Please provide your analysis in this EXACT format with clear delimiters:
-
-=== SUMMARY ===
-Provide a {style_desc} summary covering:
-- Main research question/objective
-- Methodology approach
-- Key results and findings
-- Main contributions to the field
-
-=== CRITIQUE ===
-Provide critical analysis addressing:
-- Strengths: What does this paper do well? Novel contributions?
-- Limitations: What are the methodological limitations or assumptions?
-- Validity: How strong is the evidence? Any concerns about conclusions?
-- Impact: Significance and potential influence of this work
-
-=== KEY FINDINGS ===
-List 3-5 most important findings as bullet points:
-- [Most important discovery or result]
-- [Second key finding]
-- [Additional findings...]
+Remember to use the EXACT delimiter format shown above."""
 
-Focus on concrete, specific findings rather than general statements.
+        return [{"text": _ANALYSIS_INSTRUCTIONS}, {"text": variable}]
+
+    def _finish_all_sections(self, response_text: str, paper_id: str | None, analysis_start: float) -> Dict[str, any]:
+        parsed = _parse_structured_response(response_text)
+
+        total_duration = time.perf_counter() - analysis_start
+
+        # Per-call ids are in the call logs; a process-wide counter delta would also count
+        # other papers' calls running concurrently
+        logger.info(f"[CONSOLIDATED_ANALYSIS_COMPLETE] Paper {paper_id}: single consolidated call, Total duration: {total_duration:.2f}s")
+        logger.info(f"Generated summary: {len(parsed['summary'])} chars, critique: {len(parsed['critique'])} chars, findings: {len(parsed['key_findings'])}, citations: {len(parsed['citations'])}")
+
+        return parsed
+
+    def _oversize_parts(self, text: str, style: str, context: str, paper_id: str | None) -> List[List[dict]]:
+        """The consolidated prompt once per chunk of a paper too large for one request."""
+        safe_context = truncate_utf8(context or "", settings.gemini_max_context_bytes)
+        max_bytes = _calculate_safe_chunk_size(_ANALYSIS_INSTRUCTIONS, safe_context, settings.gemini_max_total_bytes)
+        max_tokens = min(settings.gemini_gen_chunk_tokens, max_bytes // 4)
+        # Token-packed chunks of dense non-ASCII text can still run past the byte budget, which
+        # _all_sections_parts would truncate away; byte-split those so every chunk arrives whole
+        chunks = [
+            piece
+            for chunk in _shared_chunks(text, max_tokens, settings.gemini_gen_chunk_overlap)
+            for piece in split_utf8(chunk, max_bytes)
+        ]
+        return [self._all_sections_parts(chunk, style, context, paper_id) for chunk in chunks]
+
+    @staticmethod
+    def _finish_chunked(responses: List[str], paper_id: str | None, analysis_start: float) -> Dict[str, any]:
+        """Merge per-chunk analyses: prose sections joined in order, lists deduped."""
+        parsed = [_parse_structured_response(r) for r in responses]
+        sections = {
+            "summary": "\n\n".join(p["summary"] for p in parsed if p["summary"]),
+            "critique": "\n\n".join(p["critique"] for p in parsed if p["critique"]),
+            "key_findings": _dedupe_lines([f for p in parsed for f in p["key_findings"]], 5),
+            "citations": _dedupe_lines([c for p in parsed for c in p["citations"]], 5),
+        }
+        logger.info(f"[CHUNKED_ANALYSIS_COMPLETE] Paper {paper_id}: {len(responses)} chunk calls, Total duration: {time.perf_counter() - analysis_start:.2f}s")
+        return sections
+
+    @staticmethod
+    def _failed_all_sections(paper_id: str | None, e: Exception) -> Dict[str, any]:
+        logger.error(f"[CONSOLIDATED_ANALYSIS_FAILED] Analysis failed for paper {paper_id}: {e}")
+        return {
+            "summary": f"Analysis failed for paper {paper_id}. Please try again.",
+            "critique": "",
+            "key_findings": [],
+            "citations": []
+        }
 
-=== CITATIONS ===
-List the most important references cited (up to 5):
-- [Key citation 1 - Author(s), Year, Brief relevance]
-- [Key citation 2]
-- ...
+    @staticmethod
+    def _chunked_oversize(text: str) -> bool:
+        """Whether this paper skips truncation for the per-chunk path (GEMINI_OVERSIZE_STRATEGY)."""
+        return settings.gemini_oversize_strategy == "chunked" and utf8_len(text) > settings.gemini_max_total_bytes
+
+    def _all_sections(self, text: str, style: str, context: str, paper_id: str | None, strategy: str = "single call") -> Dict[str, any]:
+        """One consolidated call; unlike analyze_all_sections, failures propagate."""
+        analysis_start = time.perf_counter()
+        if self._chunked_oversize(text):
+            responses = _gen_many(self._oversize_parts(text, style, context, paper_id), settings.gemini_max_output_tokens)
+            return self._finish_chunked(responses, paper_id, analysis_start)
+        parts = self._all_sections_parts(text, style, context, paper_id)
+
+        logger.info(f"[API_CALL_START] GEMINI_FINAL_ANALYSIS ({strategy} strategy)")
+
+        response_text = _gen_with_retry(
+            parts,
+            max_output_tokens=settings.gemini_max_output_tokens,
+            call_info=f"(Final Analysis for {paper_id})"
+        )
+        return self._finish_all_sections(response_text, paper_id, analysis_start)
+
+    async def _aall_sections(self, text: str, style: str, context: str, paper_id: str | None, strategy: str = "single async call") -> Dict[str, any]:
+        analysis_start = time.perf_counter()
+        if self._chunked_oversize(text):
+            parts_list = self._oversize_parts(text, style, context, paper_id)
+            responses = await asyncio.gather(*[
+                _gen_with_retry_async(
+                    parts,
+                    max_output_tokens=settings.gemini_max_output_tokens,
+                    call_info=f"(Final Analysis for {paper_id}, chunk {i + 1}/{len(parts_list)})"
+                )
+                for i, parts in enumerate(parts_list)
+            ])
+            return self._finish_chunked(responses, paper_id, analysis_start)
+        parts = self._all_sections_parts(text, style, context, paper_id)
+
+        logger.info(f"[API_CALL_START] GEMINI_FINAL_ANALYSIS ({strategy} strategy)")
+
+        response_text = await _gen_with_retry_async(
+            parts,
+            max_output_tokens=settings.gemini_max_output_tokens,
+            call_info=f"(Final Analysis for {paper_id})"
+        )
+        return self._finish_all_sections(response_text, paper_id, analysis_start)
 
-Only include citations that are central to understanding this work.
+    def analyze_all_sections(
+        self, 
+        text: str, 
+        style: str = "medium", 
+        context: str = "", 
+        paper_id: str | None = None
+    ) -> Dict[str, any]:
+        """
+        OPTIMIZED: Single-pass analysis without extraction step for most papers.
+        """
+        try:
+            return self._all_sections(text, style, context, paper_id)
+        except Exception as e:
+            return self._failed_all_sections(paper_id, e)
 
-Remember to use the EXACT delimiter format shown above."""
-        
-        parts = [{"text": prompt}]
+    async def aanalyze_all_sections(
+        self,
+        text: str,
+        style: str = "medium",
+        context: str = "",
+        paper_id: str | None = None
+    ) -> Dict[str, any]:
+        """Async variant of analyze_all_sections; same prompt and result shape."""
+        try:
+            return await self._aall_sections(text, style, context, paper_id)
+        except Exception as e:
+            return self._failed_all_sections(paper_id, e)
 
-        logger.info(f"[API_CALL_START] GEMINI_FINAL_ANALYSIS (single call strategy)")
+    async def astream_all_sections(
+        self,
+        text: str,
+        style: str = "medium",
+        context: str = "",
+        paper_id: str | None = None
+    ):
+        """Stream the consolidated analysis, yielding (key, value) as each section completes.
 
+        Once the stream ends the full response is parsed like aanalyze_all_sections, and any
+        section the delimiters missed (or parsed differently) is yielded again with its final
+        value, so consumers should keep the last value seen per key.
+        """
+        if self._chunked_oversize(text):
+            # The per-chunk path has no single stream to split; sections arrive together
+            for key, value in (await self.aanalyze_all_sections(text, style, context, paper_id)).items():
+                yield key, value
+            return
+        analysis_start = time.perf_counter()
+        parts = self._all_sections_parts(text, style, context, paper_id)
+
+        logger.info(f"[API_CALL_START] GEMINI_FINAL_ANALYSIS (single streamed call strategy)")
+
+        splitter = _SectionStream()
+        emitted: Dict[str, any] = {}
         try:
-            response_text = _gen_with_retry(
+            async for piece in _gen_stream_async(
                 parts,
                 max_output_tokens=settings.gemini_max_output_tokens,
-                call_info=f"(Final Analysis for {paper_id})"
-            )
-
-            parsed = _parse_structured_response(response_text)
+                call_info=f"(Final Analysis for {paper_id}, streamed)"
+            ):
+                for name, content in splitter.feed(piece):
+                    key = _section_key(name)
+                    if key and key not in emitted:
+                        emitted[key] = _extract_bullets(content) if key in _LIST_SECTIONS else content
+                        yield key, emitted[key]
+            for name, content in splitter.finish():
+                key = _section_key(name)
+                if key and key not in emitted:
+                    emitted[key] = _extract_bullets(content) if key in _LIST_SECTIONS else content
+                    yield key, emitted[key]
+            final = self._finish_all_sections(splitter.text.strip(), paper_id, analysis_start)
+        except Exception as e:
+            final = self._failed_all_sections(paper_id, e)
 
-            total_duration = time.time() - analysis_start
-            total_calls = _api_call_counter - initial_call_count
+        for key, value in final.items():
+            if value and emitted.get(key) != value:
+                yield key, value
 
-            logger.info(f"[CONSOLIDATED_ANALYSIS_COMPLETE] Paper {paper_id}: Total Gemini API calls: {total_calls}, Total duration: {total_duration:.2f}s")
-            logger.info(f"Generated summary: {len(parsed['summary'])} chars, critique: {len(parsed['critique'])} chars, findings: {len(parsed['key_findings'])}, citations: {len(parsed['citations'])}")
+    def _fill_missing_parts(self, text: str, context: str, missing: List[str]) -> List[dict]:
+        keys = [k for k in missing if k in _FILL_SPECS]
+        spec = "\n".join(f'- "{k}": {_FILL_SPECS[k]}' for k in keys)
+        prompt = (
+            "You are an expert research assistant. Return ONLY a JSON object with exactly these keys:\n"
+            f"{spec}\n"
+            "Do not wrap the JSON in markdown fences."
+        )
+        safe_context = truncate_utf8(context or "", settings.gemini_max_context_bytes)
+        if safe_context:
+            prompt += "\nUse the following relevant excerpts as context:\n" + safe_context
+        safe_size = _calculate_safe_chunk_size(prompt, safe_context, settings.gemini_max_total_bytes)
+        return [{"text": prompt}, {"text": "\nPaper content:"}, {"text": truncate_utf8(text, safe_size)}]
+
+    @staticmethod
+    def _normalize_filled(data: dict, missing: List[str]) -> Dict[str, any]:
+        out: Dict[str, any] = {}
+        for key in missing:
+            value = data.get(key)
+            if key == "critique":
+                if isinstance(value, list):
+                    value = "\n".join(str(v) for v in value)
+                if isinstance(value, str) and value.strip():
+                    out[key] = value.strip()
+            elif key in _LIST_SECTIONS:
+                if isinstance(value, str):
+                    value = _extract_bullets(value) or [l.strip() for l in value.splitlines()]
+                if isinstance(value, list):
+                    items = [str(v).strip("- •*\t ") for v in value if str(v).strip()]
+                    if items:
+                        out[key] = items[:5]
+        return out
+
+    def fill_missing(self, text: str, context: str, missing: List[str]) -> Dict[str, any]:
+        """Generate only the missing sections (critique / key_findings / citations) in ONE call.
+        Returns a dict holding whichever of the requested keys could be produced.
+        """
+        if not missing:
+            return {}
+        response_text = _gen_with_retry(
+            self._fill_missing_parts(text, context, missing),
+            max_output_tokens=settings.gemini_max_output_tokens,
+            call_info=f"(Fill missing: {', '.join(missing)})"
+        )
+        return self._normalize_filled(_parse_json_object(response_text), missing)
+
+    async def afill_missing(self, text: str, context: str, missing: List[str]) -> Dict[str, any]:
+        if not missing:
+            return {}
+        response_text = await _gen_with_retry_async(
+            self._fill_missing_parts(text, context, missing),
+            max_output_tokens=settings.gemini_max_output_tokens,
+            call_info=f"(Fill missing: {', '.join(missing)})"
+        )
+        return self._normalize_filled(_parse_json_object(response_text), missing)
 
-            return parsed
+    # Chunked single-purpose prompts. Each task builds its per-chunk parts once so the
+    # sync methods and their async twins (asummarize, acritique, ...) stay in lockstep.
 
-        except Exception as e:
-            logger.error(f"[CONSOLIDATED_ANALYSIS_FAILED] Analysis failed for paper {paper_id}: {e}")
-            return {
-                "summary": f"Analysis failed for paper {paper_id}. Please try again.",
-                "critique": "",
-                "key_findings": [],
-                "citations": []
-            }
-    
-    def summarize(self, text: str, style: str = "medium", context: Optional[str] = None) -> str:
+    @staticmethod
+    def _chunk_parts(prompt: str, text: str, safe_context: str) -> List[List[dict]]:
+        # Calculate safe chunk size from the context plus a fixed allowance for the task
+        # instruction (prompt minus context), so tasks sharing a context share one chunking
+        max_total = settings.gemini_max_total_bytes
+        instruction_bytes = max(_INSTRUCTION_ALLOWANCE, utf8_len(prompt) - utf8_len(safe_context))
+        safe_chunk_size = _calculate_safe_chunk_size(safe_context, safe_context, max_total - instruction_bytes)
+        # The byte budget is the hard request limit; in tokens it is roughly bytes / 4
+        max_tokens = min(settings.gemini_gen_chunk_tokens, safe_chunk_size // 4)
+        return [
+            [{"text": prompt}, {"text": f"\nPaper content chunk {i+1}:"}, {"text": chunk}]
+            for i, chunk in enumerate(_shared_chunks(text, max_tokens, settings.gemini_gen_chunk_overlap))
+        ]
+
+    def _summarize_parts(self, text: str, style: str, context: Optional[str]) -> List[List[dict]]:
         prompt = (
             "You are an expert research assistant. Write a clear, structured overview of the paper. "
-            f"Target length: {style}. Use bullet points where helpful."
+            "Use bullet points where helpful."
         )
-        safe_context = _truncate_bytes(context or "", settings.gemini_max_context_bytes)
+        safe_context = truncate_utf8(context or "", settings.gemini_max_context_bytes)
         if safe_context:
             prompt += "\nUse the following relevant excerpts as context:\n" + safe_context
+        # The style goes after the shared instruction + context prefix, which then stays
+        # identical across styles as well as across the paper's chunks
+        prompt += f"\nTarget length: {style}."
+        return self._chunk_parts(prompt, text, safe_context)
 
-        # Calculate safe chunk size based on prompt and context
-        max_total = settings.gemini_max_total_bytes
-        safe_chunk_size = _calculate_safe_chunk_size(prompt, safe_context, max_total)
-        
-        parts = []
-        outputs: List[str] = []
-        for i, chunk in enumerate(_chunk_bytes(text, safe_chunk_size)):
-            parts = [{"text": prompt}, {"text": f"\nPaper content chunk {i+1}:",}, {"text": chunk}]
-            outputs.append(_gen_with_retry(parts, max_output_tokens=settings.gemini_max_output_tokens))
-        return "\n\n".join([o for o in outputs if o])
-
-    def critique(self, text: str, context: Optional[str] = None) -> str:
+    def _critique_parts(self, text: str, context: Optional[str]) -> List[List[dict]]:
         prompt = (
             "Provide a balanced critique focusing on methodology, assumptions, limitations, and potential improvements."
         )
-        safe_context = _truncate_bytes(context or "", settings.gemini_max_context_bytes)
+        safe_context = truncate_utf8(context or "", settings.gemini_max_context_bytes)
         if safe_context:
             prompt += "\nUse the following relevant excerpts as context:\n" + safe_context
-        
-        max_total = settings.gemini_max_total_bytes
-        safe_chunk_size = _calculate_safe_chunk_size(prompt, safe_context, max_total)
-        
-        outputs: List[str] = []
-        for i, chunk in enumerate(_chunk_bytes(text, safe_chunk_size)):
-            parts = [{"text": prompt}, {"text": f"\nPaper content chunk {i+1}:"}, {"text": chunk}]
-            outputs.append(_gen_with_retry(parts, max_output_tokens=settings.gemini_max_output_tokens))
-        return "\n\n".join([o for o in outputs if o])
+        return self._chunk_parts(prompt, text, safe_context)
 
-    def key_findings(self, text: str, context: Optional[str] = None) -> List[str]:
+    def _key_findings_parts(self, text: str, context: Optional[str]) -> List[List[dict]]:
         prompt = (
             "List the 5 most important key findings as concise bullet points. Return plain text bullets separated by new lines."
         )
-        safe_context = _truncate_bytes(context or "", settings.gemini_max_context_bytes)
+        safe_context = truncate_utf8(context or "", settings.gemini_max_context_bytes)
         if safe_context:
             prompt += "\nUse the following relevant excerpts as context:\n" + safe_context
-        
-        max_total = settings.gemini_max_total_bytes
-        safe_chunk_size = _calculate_safe_chunk_size(prompt, safe_context, max_total)
-        
-        lines: List[str] = []
-        for i, chunk in enumerate(_chunk_bytes(text, safe_chunk_size)):
-            parts = [{"text": prompt}, {"text": f"\nPaper content chunk {i+1}:"}, {"text": chunk}]
-            text_out = _gen_with_retry(parts, max_output_tokens=512)  # shorter for findings
-            lines.extend([l.strip("- •\t ") for l in text_out.splitlines() if l.strip()])
-        # dedupe while preserving order
-        seen = set()
-        uniq = []
-        for l in lines:
-            if l not in seen:
-                seen.add(l)
-                uniq.append(l)
-        return uniq[:5]
-
-    def citations(self, text: str) -> List[str]:
+        return self._chunk_parts(prompt, text, safe_context)
+
+    def _citations_parts(self, text: str) -> List[List[dict]]:
         prompt = (
             "Extract up to 5 important citations or references mentioned in the paper. "
             "Return each as a single-line citation (authors, year, title if present)."
         )
         # No context for citations, just prompt
-        max_total = settings.gemini_max_total_bytes
-        safe_chunk_size = _calculate_safe_chunk_size(prompt, "", max_total)
-        
-        lines: List[str] = []
-        for i, chunk in enumerate(_chunk_bytes(text, safe_chunk_size)):
-            parts = [{"text": prompt}, {"text": f"\nPaper content chunk {i+1}:"}, {"text": chunk}]
-            text_out = _gen_with_retry(parts, max_output_tokens=512)  # shorter for citations
-            lines.extend([l.strip("- •\t ") for l in text_out.splitlines() if l.strip()])
-        # lightly trim to 5
-        return lines[:5]
+        return self._chunk_parts(prompt, text, "")
+
+    @staticmethod
+    def _merge_findings(outputs: List[str]) -> List[str]:
+        return _dedupe_lines(_strip_bullet_lines(outputs), 5)
+
+    @staticmethod
+    def _merge_citations(outputs: List[str]) -> List[str]:
+        # The same reference often appears in several chunks; keep its first form, trim to 5
+        return _dedupe_lines(_strip_bullet_lines(outputs), 5)
+
+    # Single-task helpers. By default each is a view onto the consolidated analysis: one
+    # request covers all four sections, and since the prompt only depends on (text, style,
+    # context), calling several of them in a row is served by the generation cache after the
+    # first. The trade-off is that the four sections share one max_output_tokens budget and
+    # the paper is capped at gemini_max_total_bytes. legacy=True keeps the original per-chunk
+    # calls (whole paper, one dedicated prompt per task).
+
+    def summarize(self, text: str, style: str = "medium", context: Optional[str] = None, legacy: bool = False) -> str:
+        if not legacy:
+            return self._all_sections(text, style, context or "", None)["summary"]
+        outputs = _gen_many(self._summarize_parts(text, style, context), settings.gemini_max_output_tokens)
+        return "\n\n".join([o for o in outputs if o])
+
+    def critique(self, text: str, context: Optional[str] = None, legacy: bool = False) -> str:
+        if not legacy:
+            return self._all_sections(text, "medium", context or "", None)["critique"]
+        outputs = _gen_many(self._critique_parts(text, context), settings.gemini_max_output_tokens)
+        return "\n\n".join([o for o in outputs if o])
+
+    def key_findings(self, text: str, context: Optional[str] = None, legacy: bool = False) -> List[str]:
+        if not legacy:
+            return self._all_sections(text, "medium", context or "", None)["key_findings"]
+        outputs = _gen_many(self._key_findings_parts(text, context), 512)  # shorter for findings
+        return self._merge_findings(outputs)
+
+    def citations(self, text: str, legacy: bool = False) -> List[str]:
+        if not legacy:
+            return self._all_sections(text, "medium", "", None)["citations"]
+        outputs = _gen_many(self._citations_parts(text), 512)  # shorter for citations
+        return self._merge_citations(outputs)
+
+    # Async twins: in legacy mode every chunk is dispatched at once, so latency tracks the slowest call.
+
+    async def asummarize(self, text: str, style: str = "medium", context: Optional[str] = None, legacy: bool = False) -> str:
+        if not legacy:
+            return (await self._aall_sections(text, style, context or "", None))["summary"]
+        outputs = await asyncio.gather(*[
+            _gen_with_retry_async(parts, max_output_tokens=settings.gemini_max_output_tokens)
+            for parts in self._summarize_parts(text, style, context)
+        ])
+        return "\n\n".join([o for o in outputs if o])
 
+    async def acritique(self, text: str, context: Optional[str] = None, legacy: bool = False) -> str:
+        if not legacy:
+            return (await self._aall_sections(text, "medium", context or "", None))["critique"]
+        outputs = await asyncio.gather(*[
+            _gen_with_retry_async(parts, max_output_tokens=settings.gemini_max_output_tokens)
+            for parts in self._critique_parts(text, context)
+        ])
+        return "\n\n".join([o for o in outputs if o])
+
+    async def akey_findings(self, text: str, context: Optional[str] = None, legacy: bool = False) -> List[str]:
+        if not legacy:
+            return (await self._aall_sections(text, "medium", context or "", None))["key_findings"]
+        outputs = await asyncio.gather(*[
+            _gen_with_retry_async(parts, max_output_tokens=512)  # shorter for findings
+            for parts in self._key_findings_parts(text, context)
+        ])
+        return self._merge_findings(outputs)
+
+    async def acitations(self, text: str, legacy: bool = False) -> List[str]:
+        if not legacy:
+            return (await self._aall_sections(text, "medium", "", None))["citations"]
+        outputs = await asyncio.gather(*[
+            _gen_with_retry_async(parts, max_output_tokens=512)  # shorter for citations
+            for parts in self._citations_parts(text)
+        ])
+        return self._merge_citations(outputs)
+
+    async def amulti_task(self, text: str, tasks: List[str], style: str = "medium", context: Optional[str] = None, legacy: bool = False) -> Dict[str, any]:
+        """Run several tasks ("summary", "critique", "key_findings", "citations") together.
+
+        By default this is one consolidated request. With legacy=True the per-chunk calls of
+        every task run at once over one shared chunking.
+        """
+        runners = {
+            "summary": lambda: self.asummarize(text, style, context, legacy=True),
+            "critique": lambda: self.acritique(text, context, legacy=True),
+            "key_findings": lambda: self.akey_findings(text, context, legacy=True),
+            "citations": lambda: self.acitations(text, legacy=True),
+        }
+        unknown = [t for t in tasks if t not in runners]
+        if unknown:
+            raise ValueError(f"Unknown tasks: {unknown}")
+        if not legacy:
+            sections = await self._aall_sections(text, style, context or "", None)
+            return {t: sections[t] for t in tasks}
+        outputs = await asyncio.gather(*(runners[t]() for t in tasks))
+        return dict(zip(tasks, outputs))
 
 llm_client = LLMClient()
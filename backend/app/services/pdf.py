@@ -1,20 +1,57 @@
 import io
-from typing import Optional
+import threading
+from typing import Iterator, List, Optional
 from PyPDF2 import PdfReader
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional; PyPDF2's pure-Python extractor is used instead
+    pdfium = None
 
-def extract_text(pdf_path: str) -> str:
-    """Extract text from a PDF using PyPDF2 with fallbacks.
-    Returns a best-effort concatenation of page texts.
-    """
-    text_parts = []
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _pdfium_page_texts(pdf_path: str) -> Iterator[str]:
+    # PDFium is not thread-safe (not even across documents), and concurrent uploads ingest
+    # in parallel threads, so each document is opened, read and closed under one lock. The
+    # pages are collected first so the lock is never held across a yield to the caller;
+    # the C extractor is still many times faster than PyPDF2 per page
+    texts: List[str] = []
+    with _PDFIUM_LOCK:
+        doc = pdfium.PdfDocument(pdf_path)
+        try:
+            for page in doc:
+                textpage = page.get_textpage()
+                try:
+                    texts.append(textpage.get_text_range().replace("\r\n", "\n"))
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            doc.close()
+    return iter(texts)
+
+
+def _pypdf2_page_texts(pdf_path: str) -> Iterator[str]:
     with open(pdf_path, "rb") as f:
         reader = PdfReader(f)
-        for i, page in enumerate(reader.pages):
+        for page in reader.pages:
             try:
-                txt = page.extract_text() or ""
+                yield page.extract_text() or ""
             except Exception:
-                txt = ""
-            if txt.strip():
-                text_parts.append(txt)
-    return "\n\n".join(text_parts)
+                yield ""
+
+
+def iter_page_texts(pdf_path: str) -> Iterator[str]:
+    """Yield the non-empty text of each page in order, one page at a time."""
+    pages = _pdfium_page_texts(pdf_path) if pdfium is not None else _pypdf2_page_texts(pdf_path)
+    for txt in pages:
+        if txt.strip():
+            yield txt
+
+
+def extract_text(pdf_path: str) -> str:
+    """Extract text from a PDF (pypdfium2 when installed, else PyPDF2).
+    Returns a best-effort concatenation of page texts.
+    """
+    return "\n\n".join(iter_page_texts(pdf_path))
@@ -0,0 +1,70 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+import threading
+import time
+
+
+class QueryCache:
+    """Thread-safe LRU cache with a per-entry TTL for vector-store query results.
+
+    Keys are tuples whose first element is the doc_id the query was scoped to
+    (or None for unscoped queries), so results can be dropped when a document
+    is re-indexed.
+    """
+
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate_doc(self, doc_id: str | None) -> None:
+        """Drop results scoped to doc_id plus unscoped results. None clears everything."""
+        with self._lock:
+            if doc_id is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k[0] in (doc_id, None)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
@@ -1,122 +1,322 @@
 from __future__ import annotations
 from typing import List, Iterable
+import asyncio
 import hashlib
 import time
 import os
+import random
+import re
+import threading
+from array import array
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import google.generativeai as genai
 from pinecone import Pinecone, ServerlessSpec
 
+try:
+    from pinecone.grpc import PineconeGRPC
+except ImportError:  # optional; needs the pinecone-client[grpc] extra
+    PineconeGRPC = None
+
+try:
+    from lru import LRU
+except ImportError:  # optional C LRU (lru-dict); fall back to an OrderedDict trimmed by hand
+    LRU = None
+
 from ..config import settings
+from ..utils.files import write_atomic
 from ..utils.logger import get_logger, track_api_call
+from .query_cache import QueryCache
+from . import rate_limit, vector_mirror
+from .genai_client import configure_genai
+from .chunking import truncate_utf8, utf8_len
 
 logger = get_logger(__name__)
 
+# Chunks per embedding call / Pinecone upsert: the Gemini batch-embed limit, and well
+# under Pinecone's 2 MB request cap for ~9 KB chunks plus 768-dim vectors
+_UPSERT_BATCH = 100
+
 # OPTIMIZATION 1: Batch embedding cache across process
-_EMB_CACHE = OrderedDict()
 _BATCH_CACHE_SIZE = 512  # Increased cache size
+_EMB_CACHE = LRU(_BATCH_CACHE_SIZE) if LRU is not None else OrderedDict()
 
+# Shared pool for fanning out independent Pinecone queries (see batch_query)
+_QUERY_POOL = ThreadPoolExecutor(max_workers=settings.pinecone_pool_threads, thread_name_prefix="pinecone-query")
+# Sub-batches of one large embedding request run here, at most gemini_embed_concurrency at once
+_EMB_POOL = ThreadPoolExecutor(max_workers=max(1, settings.gemini_embed_concurrency), thread_name_prefix="gemini-embed")
 
-def _lazy_genai_configured() -> bool:
-    api = settings.gemini_api_key
-    if not api:
-        return False
-    genai.configure(api_key=api)
-    return True
+# OPTIMIZATION 7: Cache query results per (doc_id, namespace, query, k); repeat analyses
+# of the same paper skip both the embedding call and the Pinecone round-trip
+_QUERY_CACHE = QueryCache(max_size=settings.query_cache_size, ttl_seconds=settings.query_cache_ttl)
 
 
-def _truncate_bytes(text: str, max_bytes: int) -> str:
-    b = text.encode("utf-8")
-    if len(b) <= max_bytes:
-        return text
-    return b[:max_bytes].decode("utf-8", errors="ignore")
+def _filter_doc_id(filter: dict | None) -> tuple[bool, str | None]:
+    """Return (cacheable, doc_id) for a query filter. Only unfiltered and doc_id-equality
+    filters are cached, since those are the only scopes add_batch can invalidate."""
+    if not filter:
+        return True, None
+    cond = filter.get("doc_id") if len(filter) == 1 else None
+    if isinstance(cond, dict) and set(cond) == {"$eq"}:
+        return True, cond["$eq"]
+    return False, None
+
+
+def _query_cache_key(q: str, k: int, namespace: str | None, filter: dict | None) -> tuple | None:
+    cacheable, doc_id = _filter_doc_id(filter)
+    if not cacheable:
+        return None
+    digest = hashlib.blake2b(q.encode("utf-8"), digest_size=16).digest()
+    return (doc_id, namespace or "docs", digest, k)
+
+
+# OPTIMIZATION 8: Embeddings also persist on disk (float32, like Pinecone stores them),
+# under a directory versioned by embedding model, so re-ingesting a known chunk after a
+# restart skips the Gemini call and a model change can never serve stale vectors
+_EMB_MODEL = (settings.gemini_embedding_model or "text-embedding-004").strip()
+_EMB_DIR = os.path.join(settings.storage_dir, "cache", "emb", re.sub(r"[^A-Za-z0-9_.-]", "_", _EMB_MODEL))
+os.makedirs(_EMB_DIR, exist_ok=True)
+
+
+def _emb_disk_get(key: str) -> List[float] | None:
+    path = os.path.join(_EMB_DIR, key)
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    # A damaged file (e.g. from a version that wrote in place) must not yield a short vector
+    dim = _KNOWN_EMB_DIM
+    if not raw or len(raw) % 4 or (dim is not None and len(raw) != dim * 4):
+        logger.warning(f"Discarding corrupt cached embedding {key} ({len(raw)} bytes)")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    vec = array("f")
+    vec.frombytes(raw)
+    return vec.tolist()
+
+
+def _emb_disk_put(key: str, emb: List[float]) -> None:
+    try:
+        write_atomic(os.path.join(_EMB_DIR, key), array("f", emb).tobytes())
+    except OSError as e:
+        logger.warning(f"Could not persist embedding {key}: {e}")
+
+
+_EMB_MODEL_NAME = _EMB_MODEL if _EMB_MODEL.startswith("models/") else f"models/{_EMB_MODEL}"
+
+# Output dimensions of the Gemini embedding models, so index creation and GEMINI_VERIFY_DIM
+# need no probe call; unlisted models still fall back to probing
+_MODEL_DIMS = {
+    "text-embedding-004": 768,
+    "embedding-001": 768,
+    "gemini-embedding-001": 3072,
+}
+_KNOWN_EMB_DIM = _MODEL_DIMS.get(_EMB_MODEL_NAME[len("models/"):])
+
+
+def _emb_cache_get(key: str) -> List[float] | None:
+    if LRU is not None:
+        return _EMB_CACHE.get(key)  # LRU.get also marks the key most recently used
+    emb = _EMB_CACHE.get(key)
+    if emb is not None:
+        _EMB_CACHE.move_to_end(key)
+    return emb
+
+
+def _emb_cache_put(key: str, emb: List[float]) -> None:
+    _EMB_CACHE[key] = emb
+    if LRU is None and len(_EMB_CACHE) > _BATCH_CACHE_SIZE:
+        _EMB_CACHE.popitem(last=False)
+
+
+def _emb_lookup(texts: List[str]) -> tuple[List[str], List[str], List[List[float] | None], List[int]]:
+    """Truncate texts and serve what we can from the memory/disk caches. Returns
+    (safe_texts, their cache keys, results with None for misses, indices of the misses).
+    A text repeated within the batch is listed once; _emb_fan_out copies its embedding."""
+    # Truncate all texts
+    safe_texts = [truncate_utf8(t, int(getattr(settings, "gemini_emb_trunc_bytes", 24_000))) for t in texts]
+    
+    # Check cache first
+    uncached_indices = []
+    results: List[List[float] | None] = [None] * len(texts)
+    # Hashed once here; _emb_fill stores the misses under the same keys
+    keys = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in safe_texts]
+    missed = set()
+    
+    for i, key in enumerate(keys):
+        if key in missed:
+            continue  # repeat of a text already queued for embedding
+        emb = _emb_cache_get(key)
+        if emb is not None:
+            results[i] = emb
+            continue
+        emb = _emb_disk_get(key)
+        if emb is not None:
+            results[i] = emb
+            _emb_cache_put(key, emb)
+        else:
+            uncached_indices.append(i)
+            missed.add(key)
+    return safe_texts, keys, results, uncached_indices
+
+
+def _emb_fan_out(keys: List[str], results: List[List[float] | None]) -> None:
+    """Give in-batch repeats the embedding computed for their first occurrence."""
+    if None not in results:
+        return
+    by_key = {key: emb for key, emb in zip(keys, results) if emb is not None}
+    for i, emb in enumerate(results):
+        if emb is None:
+            results[i] = by_key[keys[i]]
+
+
+def _emb_fill(resp, keys: List[str], results: List[List[float] | None], uncached_indices: List[int]) -> None:
+    """Copy embeddings from an embed_content response into results and the caches."""
+    # Extract embeddings - handle different response formats
+    if isinstance(resp, dict):
+        embeddings = resp.get("embeddings", resp.get("embedding", []))
+    else:
+        embeddings = resp.embeddings if hasattr(resp, 'embeddings') else [resp.embedding]
+    
+    # Cache and fill results
+    for i, idx in enumerate(uncached_indices):
+        # Handle different embedding formats
+        if isinstance(embeddings[i], list):
+            emb = embeddings[i]
+        elif isinstance(embeddings[i], dict):
+            emb = embeddings[i].get("values", embeddings[i].get("embedding", []))
+        else:
+            emb = embeddings[i].values if hasattr(embeddings[i], 'values') else embeddings[i].embedding
+        
+        results[idx] = emb
+        
+        # Update cache
+        key = keys[idx]
+        _emb_cache_put(key, emb)
+        _emb_disk_put(key, emb)
+
+
+def _emb_groups(uncached_indices: List[int]) -> List[List[int]]:
+    """Split the misses into sub-batches within the per-call batch-embed limit."""
+    return [uncached_indices[i:i + _UPSERT_BATCH] for i in range(0, len(uncached_indices), _UPSERT_BATCH)]
+
+
+def _retry_sleep(e: Exception, backoff: float, attempt: int) -> float:
+    # A 429 stalls every embedding caller for the server-suggested wait (or the backoff);
+    # jittered, so sub-batches that hit it together do not all retry in lockstep
+    error_str = str(e)
+    delay = rate_limit.server_delay(error_str)
+    delay = backoff * attempt * random.uniform(0.5, 1.5) if delay is None else delay + random.uniform(0, 1)
+    if "429" in error_str:
+        rate_limit.embedding.cool_down(delay)
+    return delay
+
+
+def _embed_with_retry(texts: List[str]):
+    """One embed_content call for up to _UPSERT_BATCH texts, retried with backoff."""
+    max_retries = int(getattr(settings, "gemini_max_retries", 3))
+    backoff = float(getattr(settings, "gemini_retry_backoff", 1.0))
+    last_err = None
+    for attempt in range(1, max_retries + 1):
+        wait = rate_limit.embedding.reserve(len(texts))
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            # Use batch embed_content with task_type
+            return genai.embed_content(
+                model=_EMB_MODEL_NAME,
+                content=texts,
+                task_type="RETRIEVAL_DOCUMENT"  # Optimize for retrieval
+            )
+        except Exception as e:
+            last_err = e
+            logger.warning(f"Batch embedding attempt {attempt}/{max_retries} failed: {e}")
+            if attempt < max_retries:
+                time.sleep(_retry_sleep(e, backoff, attempt))
+    raise RuntimeError(f"Batch embedding failed after {max_retries} retries: {last_err}")
+
+
+async def _aembed_with_retry(texts: List[str], sem: asyncio.Semaphore):
+    """Async twin of _embed_with_retry; sem bounds the sub-batches in flight."""
+    max_retries = int(getattr(settings, "gemini_max_retries", 3))
+    backoff = float(getattr(settings, "gemini_retry_backoff", 1.0))
+    last_err = None
+    for attempt in range(1, max_retries + 1):
+        wait = rate_limit.embedding.reserve(len(texts))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            async with sem:
+                return await genai.embed_content_async(
+                    model=_EMB_MODEL_NAME,
+                    content=texts,
+                    task_type="RETRIEVAL_DOCUMENT"
+                )
+        except Exception as e:
+            last_err = e
+            logger.warning(f"Async batch embedding attempt {attempt}/{max_retries} failed: {e}")
+            if attempt < max_retries:
+                await asyncio.sleep(_retry_sleep(e, backoff, attempt))
+    raise RuntimeError(f"Batch embedding failed after {max_retries} retries: {last_err}")
 
 
 # OPTIMIZATION 2: Batch embedding API
 @track_api_call("GEMINI_EMBEDDING_BATCH")
 def _embedding_for_batch(texts: List[str]) -> List[List[float]]:
-    """Embed multiple texts in a single API call using task_type batching."""
-    if not _lazy_genai_configured():
+    """Embed multiple texts with task_type batching: one API call per 100 misses,
+    with the sub-batches of a larger request sent concurrently on _EMB_POOL."""
+    if not configure_genai():
         raise RuntimeError("GEMINI_API_KEY not configured")
     
     if not texts:
         return []
     
-    model = (settings.gemini_embedding_model or "text-embedding-004").strip()
-    model_name = model if model.startswith("models/") else f"models/{model}"
+    safe_texts, keys, results, uncached_indices = _emb_lookup(texts)
     
-    # Truncate all texts
-    safe_texts = [_truncate_bytes(t, int(getattr(settings, "gemini_emb_trunc_bytes", 24_000))) for t in texts]
+    # Batch embed uncached texts
+    if uncached_indices:
+        groups = _emb_groups(uncached_indices)
+        batches = [[safe_texts[i] for i in g] for g in groups]
+        resps = [_embed_with_retry(batches[0])] if len(groups) == 1 else _EMB_POOL.map(_embed_with_retry, batches)
+        # Results and caches are filled here, in order, rather than from the pool threads
+        for resp, group in zip(resps, groups):
+            _emb_fill(resp, keys, results, group)
+        _emb_fan_out(keys, results)
+        logger.info(f"Batch embedded {len(uncached_indices)} texts in {len(groups)} call(s), {len(texts) - len(uncached_indices)} from cache or repeated")
+    else:
+        logger.info(f"All {len(texts)} texts retrieved from cache")
     
-    # Check cache first
-    uncached_indices = []
-    results = [None] * len(texts)
+    return results  # type: ignore[return-value]
+
+
+@track_api_call("GEMINI_EMBEDDING_BATCH_ASYNC")
+async def _aembedding_for_batch(texts: List[str]) -> List[List[float]]:
+    """Async twin of _embedding_for_batch (same caches, same retry policy)."""
+    if not configure_genai():
+        raise RuntimeError("GEMINI_API_KEY not configured")
     
-    for i, text in enumerate(safe_texts):
-        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
-        if key in _EMB_CACHE:
-            _EMB_CACHE.move_to_end(key)
-            results[i] = _EMB_CACHE[key]
-        else:
-            uncached_indices.append(i)
+    if not texts:
+        return []
+    
+    safe_texts, keys, results, uncached_indices = _emb_lookup(texts)
     
-    # Batch embed uncached texts
     if uncached_indices:
-        uncached_texts = [safe_texts[i] for i in uncached_indices]
-        
-        max_retries = int(getattr(settings, "gemini_max_retries", 3))
-        backoff = float(getattr(settings, "gemini_retry_backoff", 1.0))
-        last_err = None
-        
-        for attempt in range(1, max_retries + 1):
-            try:
-                # Use batch embed_content with task_type
-                resp = genai.embed_content(
-                    model=model_name,
-                    content=uncached_texts,
-                    task_type="RETRIEVAL_DOCUMENT"  # Optimize for retrieval
-                )
-                
-                # Extract embeddings - handle different response formats
-                if isinstance(resp, dict):
-                    embeddings = resp.get("embeddings", resp.get("embedding", []))
-                else:
-                    embeddings = resp.embeddings if hasattr(resp, 'embeddings') else [resp.embedding]
-                
-                # Cache and fill results
-                for i, idx in enumerate(uncached_indices):
-                    # Handle different embedding formats
-                    if isinstance(embeddings[i], list):
-                        emb = embeddings[i]
-                    elif isinstance(embeddings[i], dict):
-                        emb = embeddings[i].get("values", embeddings[i].get("embedding", []))
-                    else:
-                        emb = embeddings[i].values if hasattr(embeddings[i], 'values') else embeddings[i].embedding
-                    
-                    results[idx] = emb
-                    
-                    # Update cache
-                    key = hashlib.sha1(safe_texts[idx].encode("utf-8")).hexdigest()
-                    _EMB_CACHE[key] = emb
-                    if len(_EMB_CACHE) > _BATCH_CACHE_SIZE:
-                        _EMB_CACHE.popitem(last=False)
-                
-                logger.info(f"Batch embedded {len(uncached_indices)} texts, {len(results) - len(uncached_indices)} from cache")
-                break
-                
-            except Exception as e:
-                last_err = e
-                logger.warning(f"Batch embedding attempt {attempt}/{max_retries} failed: {e}")
-                if attempt < max_retries:
-                    time.sleep(backoff * attempt)
-        
-        if any(r is None for r in results):
-            raise RuntimeError(f"Batch embedding failed after {max_retries} retries: {last_err}")
+        groups = _emb_groups(uncached_indices)
+        sem = asyncio.Semaphore(max(1, settings.gemini_embed_concurrency))
+        resps = await asyncio.gather(*(_aembed_with_retry([safe_texts[i] for i in g], sem) for g in groups))
+        for resp, group in zip(resps, groups):
+            _emb_fill(resp, keys, results, group)
+        _emb_fan_out(keys, results)
+        logger.info(f"Batch embedded {len(uncached_indices)} texts in {len(groups)} call(s), {len(texts) - len(uncached_indices)} from cache or repeated")
     else:
         logger.info(f"All {len(texts)} texts retrieved from cache")
     
-    return results
+    return results  # type: ignore[return-value]
 
 
 def _embedding_for(text: str) -> List[float]:
@@ -125,51 +325,75 @@ def _embedding_for(text: str) -> List[float]:
 
 
 # OPTIMIZATION 3: Smarter chunking with overlap for better context
+def _utf8_start(b: bytes, pos: int) -> int:
+    """Move pos back to the first byte of the UTF-8 character it falls inside."""
+    while 0 < pos < len(b) and (b[pos] & 0xC0) == 0x80:
+        pos -= 1
+    return pos
+
+
 def _chunk_with_overlap(text: str, max_bytes: int = 9000, overlap_bytes: int = 300) -> List[str]:
     """
     Chunk text with overlap to preserve context at boundaries.
     Increased default chunk size from 6000 to 9000 to reduce total chunks by ~25%.
+    Every cut lands on a UTF-8 character boundary, so no characters are dropped.
     """
     b = text.encode("utf-8")
+    n = len(b)
     chunks: List[str] = []
     
-    if len(b) <= max_bytes:
+    if n <= max_bytes:
         return [text]
     
+    mv = memoryview(b)  # chunks decode straight from the buffer, without a bytes copy per slice
     i = 0
-    while i < len(b):
-        end = min(i + max_bytes, len(b))
-        chunk_bytes = b[i:end]
+    while i < n:
+        end = min(i + max_bytes, n)
         
         # Try to break at sentence boundary if not at end
-        if end < len(b):
-            # Look for sentence endings in the last 200 bytes
-            last_section = chunk_bytes[-200:]
-            for sep in [b'. ', b'.\n', b'! ', b'? ', b'\n\n']:
-                idx = last_section.rfind(sep)
+        if end < n:
+            # Look for sentence endings in the last 200 bytes (searched in place, no slice copy)
+            window = max(i, end - 200)
+            for sep in (b'. ', b'.\n', b'! ', b'? ', b'\n\n'):
+                idx = b.rfind(sep, window, end)
                 if idx != -1:
                     # Adjust end to sentence boundary
-                    actual_end = i + len(chunk_bytes) - 200 + idx + len(sep)
-                    chunk_bytes = b[i:actual_end]
+                    end = idx + len(sep)
                     break
+            else:
+                end = _utf8_start(b, end)
         
-        chunk_text = chunk_bytes.decode("utf-8", errors="ignore").strip()
+        chunk_text = str(mv[i:end], "utf-8").strip()
         if chunk_text:
             chunks.append(chunk_text)
         
+        if end >= n:
+            break
         # Move forward with overlap
-        i += len(chunk_bytes) - overlap_bytes if end < len(b) else len(chunk_bytes)
+        nxt = _utf8_start(b, end - overlap_bytes)
+        i = nxt if nxt > i else end
     
-    old_strategy_chunks = len(b) // 6000 + (1 if len(b) % 6000 else 0)
-    logger.info(f"Chunked {len(b)} bytes into {len(chunks)} chunks (old strategy: ~{old_strategy_chunks}, saved {old_strategy_chunks - len(chunks)} chunks)")
+    old_strategy_chunks = n // 6000 + (1 if n % 6000 else 0)
+    logger.info(f"Chunked {n} bytes into {len(chunks)} chunks (old strategy: ~{old_strategy_chunks}, saved {old_strategy_chunks - len(chunks)} chunks)")
     return chunks
 
 
+def forget_doc(doc_id: str, namespace: str = "docs") -> None:
+    """Drop this process's cached results and mirrored vectors for a paper indexed elsewhere
+    (an ingest worker process or Celery), which cannot reach this process's caches itself."""
+    _QUERY_CACHE.invalidate_doc(doc_id)
+    vector_mirror.forget(namespace, doc_id)
+
+
 class PineconeVectorStore:
     def __init__(self):
         if not settings.pinecone_api_key:
             raise RuntimeError("PINECONE_API_KEY not configured")
-        self.pc = Pinecone(api_key=settings.pinecone_api_key)
+        # gRPC sends vectors as protobuf instead of JSON; the control plane calls are the same
+        self._grpc = settings.pinecone_grpc and PineconeGRPC is not None
+        if settings.pinecone_grpc and not self._grpc:
+            logger.warning("PINECONE_GRPC is set but pinecone-client[grpc] is not installed; using REST")
+        self.pc = (PineconeGRPC if self._grpc else Pinecone)(api_key=settings.pinecone_api_key)
         self.index_name = settings.pinecone_index
         # Decide whether we need to probe Gemini for embedding dimension
         existing = {idx.name for idx in self.pc.list_indexes()}
@@ -177,8 +401,8 @@ class PineconeVectorStore:
         env_dim_raw = os.getenv("PINECONE_DIM")
         have_env_dim = bool(env_dim_raw)
 
-        detected_emb_dim: int | None = None
-        if need_index and not have_env_dim and settings.gemini_probe_on_startup:
+        detected_emb_dim: int | None = _KNOWN_EMB_DIM
+        if need_index and not have_env_dim and detected_emb_dim is None and settings.gemini_probe_on_startup:
             try:
                 probe = _embedding_for("__dimension_probe__")
                 detected_emb_dim = len(probe)
@@ -186,6 +410,9 @@ class PineconeVectorStore:
                 logger.warning(f"Embedding dim probe skipped/fallback (startup): {e}")
 
         desired_dim = int(env_dim_raw) if have_env_dim else int(detected_emb_dim or getattr(settings, "pinecone_dim", 1536))
+        if need_index:
+            source = "PINECONE_DIM" if have_env_dim else ("model table" if _KNOWN_EMB_DIM else ("probe" if detected_emb_dim else "default"))
+            logger.info(f"Creating index '{self.index_name}' with dimension {desired_dim} (from {source})")
 
         if need_index:
             self.pc.create_index(
@@ -194,15 +421,24 @@ class PineconeVectorStore:
                 metric="cosine",
                 spec=ServerlessSpec(cloud=settings.pinecone_cloud, region=settings.pinecone_region),
             )
-            # Wait until ready
+            # Wait until ready: poll quickly at first (small indexes are often ready within
+            # a second), backing off to every 2s
+            delay = 0.1
             while not self.pc.describe_index(self.index_name).status["ready"]:  # type: ignore
-                time.sleep(1)
-        self.index = self.pc.Index(self.index_name)
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+        # The Index client keeps one pooled keep-alive HTTP connection manager for the
+        # process (store is a singleton); size it for the concurrent batch_query fan-out
+        # (the gRPC index multiplexes one channel instead and takes no pool size)
+        if self._grpc:
+            self.index = self.pc.Index(self.index_name)
+        else:
+            self.index = self.pc.Index(self.index_name, pool_threads=settings.pinecone_pool_threads)
 
         # Optionally verify at startup (can make a Gemini call). Disabled by default.
         if settings.gemini_verify_dim:
             try:
-                emb_dim = len(_embedding_for("__dimension_probe__"))
+                emb_dim = _KNOWN_EMB_DIM or len(_embedding_for("__dimension_probe__"))
                 if emb_dim != int(desired_dim):
                     msg = (
                         f"Embedding dim ({emb_dim}) does not match Pinecone index dim ({desired_dim}). "
@@ -218,41 +454,62 @@ class PineconeVectorStore:
 
     @track_api_call("PINECONE_BATCH_UPSERT")
     def add_batch(self, texts: List[str], namespace: str | None = None, metadata: dict | None = None, base_id: str | None = None):
-        """OPTIMIZATION 4: Batch embed and upsert in one go."""
+        """OPTIMIZATION 4: Batch embed and upsert, _UPSERT_BATCH chunks at a time.
+
+        Texts are embedded a window of gemini_embed_concurrency slices at a time (one
+        concurrent call per slice); each slice is then upserted asynchronously (async_req on
+        the Index pool), so the next window is embedded while those upserts are in flight
+        and request size and memory stay bounded by the window, not the document.
+        """
         if not texts:
             return
         
         logger.info(f"Batch processing {len(texts)} chunks for embedding and upsert")
         
-        # Single batch embedding call (HUGE OPTIMIZATION)
-        embeddings = _embedding_for_batch(texts)
-        
-        # Prepare vectors
         md = metadata or {}
-        vects = []
-        for i, (txt, emb) in enumerate(zip(texts, embeddings)):
-            vid = base_id or hashlib.md5((txt[:64] + str(i)).encode()).hexdigest()
-            vects.append({
-                "id": f"{vid}-{i}",
-                "values": emb,
-                "metadata": {"text": txt, "chunk_index": i, **md}
-            })
-        
-        # Single upsert
-        self.index.upsert(vectors=vects, namespace=namespace)
-        logger.info(f"Upserted {len(vects)} vectors in single batch (saved {len(vects)-1} API calls)")
+        pending = []
+        mirrored: List[dict] = []
+        window = _UPSERT_BATCH * max(1, settings.gemini_embed_concurrency)
+        for start in range(0, len(texts), _UPSERT_BATCH):
+            if start % window == 0:
+                # Single batch embedding call per slice (HUGE OPTIMIZATION), slices in parallel
+                window_embs = _embedding_for_batch(texts[start:start + window])
+            batch = texts[start:start + _UPSERT_BATCH]
+            embeddings = window_embs[start % window:start % window + _UPSERT_BATCH]
+            vects = []
+            for i, (txt, emb) in enumerate(zip(batch, embeddings), start=start):
+                vid = base_id or hashlib.md5((txt[:64] + str(i)).encode()).hexdigest()
+                vects.append({
+                    "id": f"{vid}-{i}",
+                    "values": emb,
+                    "metadata": {"text": txt, "chunk_index": i, **md}
+                })
+            pending.append(self.index.upsert(vectors=vects, namespace=namespace, async_req=True))
+            if md.get("doc_id"):
+                mirrored.extend(vects)
+
+        # Surface any upsert failure before reporting success
+        for p in pending:
+            p.result() if self._grpc else p.get()  # gRPC futures vs the REST pool's AsyncResult
+        _QUERY_CACHE.invalidate_doc(md.get("doc_id"))
+        if mirrored:
+            vector_mirror.record(namespace or "docs", md["doc_id"], mirrored)
+        logger.info(f"Upserted {len(texts)} vectors in {len(pending)} batch(es)")
 
     def add_document(self, doc_id: str, text: str, extra_meta: dict | None = None):
         """OPTIMIZATION 5: Use improved chunking and batch operations."""
         # Use 9000 byte chunks with 300 byte overlap (optimized from 6000 bytes)
         chunks = _chunk_with_overlap(text, max_bytes=9000, overlap_bytes=300)
-        old_chunk_count = len(text.encode('utf-8')) // 6000 + 1
+        old_chunk_count = utf8_len(text) // 6000 + 1
         logger.info(f"Document {doc_id}: {len(chunks)} chunks (old: ~{old_chunk_count}, saved {old_chunk_count - len(chunks)} chunks)")
         self.add_batch(chunks, namespace="docs", metadata={"doc_id": doc_id, **(extra_meta or {})}, base_id=doc_id)
 
-    def query(self, q: str, k: int = 5, namespace: str | None = None, filter: dict | None = None) -> List[dict]:
-        """Query with single embedding call."""
-        emb = _embedding_for(q)
+    def _query_vector(self, emb: List[float], k: int, namespace: str | None, filter: dict | None) -> List[dict]:
+        _, doc_id = _filter_doc_id(filter)
+        if doc_id is not None:
+            local = vector_mirror.search(namespace or "docs", doc_id, emb, k)
+            if local is not None:
+                return local
         res = self.index.query(vector=emb, top_k=k, include_metadata=True, namespace=namespace or "docs", filter=filter)
         matches = getattr(res, "matches", []) or res.get("matches", [])  # type: ignore
         out: List[dict] = []
@@ -265,14 +522,86 @@ class PineconeVectorStore:
             })
         return out
 
+    def query(self, q: str, k: int = 5, namespace: str | None = None, filter: dict | None = None) -> List[dict]:
+        """Query with single embedding call (served from the query cache when possible)."""
+        key = _query_cache_key(q, k, namespace, filter)
+        if key is not None:
+            cached = _QUERY_CACHE.get(key)
+            if cached is not None:
+                logger.info(f"Query cache hit for doc_id={key[0]}")
+                return cached
+        emb = _embedding_for(q)
+        out = self._query_vector(emb, k, namespace, filter)
+        if key is not None:
+            _QUERY_CACHE.put(key, out)
+        return out
+
+    def batch_query(self, texts: List[str], k: int = 5, namespace: str | None = None, filter: dict | None = None) -> List[List[dict]]:
+        """OPTIMIZATION 6: Embed all queries in one batch call, then run the Pinecone lookups concurrently.
+        Returns one list of matches per input text, in input order.
+        """
+        if not texts:
+            return []
+        keys = [_query_cache_key(t, k, namespace, filter) for t in texts]
+        results: List[List[dict] | None] = [
+            _QUERY_CACHE.get(key) if key is not None else None for key in keys
+        ]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if not missing:
+            logger.info(f"Query cache hit for all {len(texts)} batched queries")
+            return results  # type: ignore[return-value]
+
+        embs = _embedding_for_batch([texts[i] for i in missing])
+        if len(embs) == 1:
+            fetched = [self._query_vector(embs[0], k, namespace, filter)]
+        else:
+            futures = [_QUERY_POOL.submit(self._query_vector, emb, k, namespace, filter) for emb in embs]
+            fetched = [f.result() for f in futures]
+        for i, out in zip(missing, fetched):
+            results[i] = out
+            if keys[i] is not None:
+                _QUERY_CACHE.put(keys[i], out)
+        return results  # type: ignore[return-value]
+
+    async def abatch_query(self, texts: List[str], k: int = 5, namespace: str | None = None, filter: dict | None = None) -> List[List[dict]]:
+        """Async batch_query: embeds without blocking the event loop and gathers the
+        Pinecone lookups (run on the shared query pool) so several papers can retrieve at once.
+        """
+        if not texts:
+            return []
+        keys = [_query_cache_key(t, k, namespace, filter) for t in texts]
+        results: List[List[dict] | None] = [
+            _QUERY_CACHE.get(key) if key is not None else None for key in keys
+        ]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if not missing:
+            logger.info(f"Query cache hit for all {len(texts)} batched queries")
+            return results  # type: ignore[return-value]
+
+        embs = await _aembedding_for_batch([texts[i] for i in missing])
+        loop = asyncio.get_running_loop()
+        fetched = await asyncio.gather(*(
+            loop.run_in_executor(_QUERY_POOL, self._query_vector, emb, k, namespace, filter) for emb in embs
+        ))
+        for i, out in zip(missing, fetched):
+            results[i] = out
+            if keys[i] is not None:
+                _QUERY_CACHE.put(keys[i], out)
+        return results  # type: ignore[return-value]
+
 
 class _LazyPineconeStore:
     def __init__(self):
         self._inst: PineconeVectorStore | None = None
+        self._lock = threading.Lock()
 
     def _ensure(self) -> PineconeVectorStore:
+        # Startup warm-up (a worker thread) and the first request can race here; without
+        # the lock both would connect and run list_indexes()/create_index()
         if self._inst is None:
-            self._inst = PineconeVectorStore()
+            with self._lock:
+                if self._inst is None:
+                    self._inst = PineconeVectorStore()
         return self._inst
 
     def __getattr__(self, name):
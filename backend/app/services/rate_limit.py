@@ -0,0 +1,59 @@
+from __future__ import annotations
+import re
+import threading
+import time
+from typing import Callable
+
+from ..config import settings
+
+# Shared pacing for Gemini calls across every thread and task in the process. An optional
+# per-minute limit is enforced as a token bucket (GCRA), and a 429 sets a cooldown that all
+# callers wait out instead of each discovering it. Generation and embedding have separate
+# quotas, so each gets its own bucket.
+
+# Server-suggested wait in a 429 message: "Please retry in 37.5s" or "retry_delay { seconds: 37 }"
+_RETRY_DELAY_RE = re.compile(r"retry(?: in |_delay\s*\{\s*seconds:\s*)(\d+(?:\.\d+)?)")
+
+
+def server_delay(error: str) -> float | None:
+    """Seconds the API asked us to wait in a 429 error message, if it said."""
+    match = _RETRY_DELAY_RE.search(error) if "429" in error else None
+    return float(match.group(1)) if match else None
+
+
+class _Bucket:
+    def __init__(self, per_minute: Callable[[], int], burst: Callable[[], int]):
+        self._per_minute = per_minute
+        self._burst = burst
+        self._lock = threading.Lock()
+        self._tat = 0.0  # theoretical arrival time of the next unit
+        self._cooldown_until = 0.0
+
+    def reserve(self, units: int = 1) -> float:
+        """Claim `units` of quota; returns how many seconds the caller must wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._cooldown_until)
+            rate = self._per_minute()
+            if rate > 0:
+                interval = 60.0 / rate
+                burst = max(1, self._burst()) * interval
+                cost = min(units, max(1, self._burst())) * interval
+                start = max(start, self._tat - burst + cost)
+                self._tat = max(self._tat, start) + cost
+            return start - now
+
+    def cool_down(self, seconds: float) -> None:
+        """Hold back every caller for `seconds` (the server told us the quota is exhausted)."""
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+
+
+# GEMINI_RPM generations per minute, bursting up to gemini_concurrency calls
+generation = _Bucket(lambda: settings.gemini_rpm, lambda: settings.gemini_concurrency)
+# GEMINI_EMBED_RPM embedded texts per minute (a batch call spends one unit per text),
+# with a full minute's quota available as burst
+embedding = _Bucket(lambda: settings.gemini_embed_rpm, lambda: settings.gemini_embed_rpm)
+
+reserve = generation.reserve
+cool_down = generation.cool_down
@@ -1,7 +1,19 @@
-import requests
-from urllib.parse import urlencode
+import io
+import httpx
+import xml.etree.ElementTree as ET
 from ..config import settings
 
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+
+# Pooled keep-alive client, so repeat searches skip the TCP + TLS handshake
+_client = httpx.Client(http2=_HTTP2, timeout=20, follow_redirects=True)
+
 
 def search_arxiv(query: str, max_results: int = 5) -> list[dict]:
     params = {
@@ -9,14 +21,18 @@ def search_arxiv(query: str, max_results: int = 5) -> list[dict]:
         "start": 0,
         "max_results": max_results,
     }
-    url = f"{settings.arxiv_api_base}?{urlencode(params)}"
-    r = requests.get(url, timeout=20)
+    r = _client.get(settings.arxiv_api_base, params=params)
     r.raise_for_status()
-    # Minimal parse; recommend using feedparser for robust parsing
+    # Entry titles only (not the feed's own title); titles can wrap over several lines.
+    # Entries are parsed incrementally, freed once read, and parsing stops at max_results.
     entries = []
-    for line in r.text.splitlines():
-        if "<title>" in line and "arXiv" not in line:
-            title = line.replace("<title>", "").replace("</title>", "").strip()
-            if title:
-                entries.append({"title": title})
-    return entries[:max_results]
+    for _, elem in ET.iterparse(io.BytesIO(r.content)):
+        if elem.tag != f"{_ATOM}entry":
+            continue
+        title = " ".join((elem.findtext(f"{_ATOM}title") or "").split())
+        elem.clear()
+        if title:
+            entries.append({"title": title})
+            if len(entries) >= max_results:
+                break
+    return entries
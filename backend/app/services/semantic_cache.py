@@ -0,0 +1,168 @@
+from __future__ import annotations
+import hashlib
+import math
+import operator
+import threading
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; similarity falls back to pure Python dot products
+    np = None
+
+from ..config import settings
+from ..utils.kv import KVNamespace
+from ..utils.logger import get_logger
+from .chunking import truncate_utf8
+
+logger = get_logger(__name__)
+
+# Near-duplicate generation cache: the head of each request is embedded and a fresh
+# request reuses a stored response when the cosine similarity clears the threshold.
+# Off by default (GEMINI_SEMANTIC_CACHE) since a hit answers a different, merely similar
+# prompt. Entries are bucketed by (model, max_output_tokens, temperature, task key), held in
+# memory and persisted to the shared KV store, which reloads them (minus expired ones) after a
+# restart. The task key hashes the instruction parts, so only the same task can ever match.
+Bucket = Tuple[str, int, float | None, str]
+Handle = Tuple[Bucket, List[float]]
+
+
+class _Entries:
+    def __init__(self):
+        self.ids: List[str] = []
+        self.vecs: List[List[float]] = []
+        self.texts: List[str] = []
+        self._matrix = None  # numpy copy of vecs, rebuilt after a store
+
+    def best(self, q: List[float]) -> tuple[float, str | None]:
+        if not self.vecs:
+            return -1.0, None
+        if np is not None:
+            if self._matrix is None:
+                self._matrix = np.asarray(self.vecs, dtype=np.float32)
+            sims = self._matrix @ np.asarray(q, dtype=np.float32)
+            i = int(sims.argmax())
+            return float(sims[i]), self.texts[i]
+        sims = [sum(map(operator.mul, v, q)) for v in self.vecs]
+        i = max(range(len(sims)), key=sims.__getitem__)
+        return sims[i], self.texts[i]
+
+    def add(self, entry_id: str, vec: List[float], text: str) -> List[str]:
+        """Append an entry; returns the ids evicted to stay within gemini_semantic_cache_size."""
+        self.ids.append(entry_id)
+        self.vecs.append(vec)
+        self.texts.append(text)
+        self._matrix = None
+        evicted = []
+        while len(self.vecs) > settings.gemini_semantic_cache_size:
+            evicted.append(self.ids[0])
+            del self.ids[0], self.vecs[0], self.texts[0]
+        return evicted
+
+
+_BUCKETS: Dict[Bucket, _Entries] = {}
+_LOCK = threading.Lock()
+_STORE = KVNamespace("semantic_cache")
+_loaded = False
+
+
+def _load() -> None:
+    """Fill _BUCKETS from the KV store once per process, oldest first; call with _LOCK held."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    cutoff = time.time() - settings.gemini_cache_ttl
+    stale = []
+    for entry_id, data in sorted(_STORE.to_dict().items(), key=lambda kv: kv[1]["at"]):
+        if data["at"] < cutoff:
+            stale.append(entry_id)
+            continue
+        bucket = (data["bucket"][0], int(data["bucket"][1]), data["bucket"][2], data["bucket"][3])
+        stale.extend(_BUCKETS.setdefault(bucket, _Entries()).add(entry_id, data["vec"], data["text"]))
+    for entry_id in stale:
+        _STORE.pop(entry_id, None)
+
+
+_COUNTS = {"hits": 0, "misses": 0}
+
+
+def enabled() -> bool:
+    return settings.gemini_semantic_cache and settings.gemini_semantic_cache_size > 0
+
+
+def probe_text(parts: List[dict]) -> str:
+    """What gets embedded: the head of the request's last part. Multi-part requests carry
+    the paper content last, after instructions that task_key() accounts for instead."""
+    return truncate_utf8(str(parts[-1].get("text", "")) if parts else "", settings.gemini_semantic_probe_bytes)
+
+
+def task_key(parts: List[dict]) -> str:
+    """Digest of every part but the last (instruction, spec, context), for the bucket; without
+    it, two tasks over the same paper content would embed identically and answer each other."""
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts[:-1]:
+        h.update(str(part.get("text", "")).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _normalize(vec: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+def embed(text: str) -> List[float] | None:
+    from .rag import _embedding_for_batch
+    try:
+        return _normalize(_embedding_for_batch([text])[0])
+    except Exception as e:
+        logger.warning(f"Semantic cache embedding failed, skipping lookup: {e}")
+        return None
+
+
+async def aembed(text: str) -> List[float] | None:
+    from .rag import _aembedding_for_batch
+    try:
+        return _normalize((await _aembedding_for_batch([text]))[0])
+    except Exception as e:
+        logger.warning(f"Semantic cache embedding failed, skipping lookup: {e}")
+        return None
+
+
+def lookup(bucket: Bucket, vec: List[float]) -> str | None:
+    with _LOCK:
+        _load()
+        entries = _BUCKETS.get(bucket)
+        score, text = entries.best(vec) if entries is not None else (-1.0, None)
+        hit = text is not None and score >= settings.gemini_semantic_threshold
+        _COUNTS["hits" if hit else "misses"] += 1
+    if hit:
+        logger.info(f"Semantic cache hit (similarity {score:.3f}, hit rate {stats()['hit_rate']:.0%})")
+        return text
+    return None
+
+
+def stats() -> dict:
+    with _LOCK:
+        total = _COUNTS["hits"] + _COUNTS["misses"]
+        return {
+            "size": sum(len(e.vecs) for e in _BUCKETS.values()),
+            **_COUNTS,
+            "hit_rate": (_COUNTS["hits"] / total) if total else 0.0,
+        }
+
+
+def store(handle: Handle, text: str) -> None:
+    if not text:
+        return
+    bucket, vec = handle
+    entry_id = uuid.uuid4().hex
+    _STORE[entry_id] = {"bucket": list(bucket), "vec": vec, "text": text, "at": time.time()}
+    with _LOCK:
+        _load()
+        evicted = _BUCKETS.setdefault(bucket, _Entries()).add(entry_id, vec, text)
+    for old_id in evicted:
+        _STORE.pop(old_id, None)
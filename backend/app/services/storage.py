@@ -4,28 +4,31 @@ import uuid
 import json
 from typing import Dict, Tuple
 from ..config import settings
+from ..utils.kv import KVNamespace
 
 class Storage:
     def __init__(self):
         self.index_path = os.path.join(settings.storage_dir, "papers_index.json")
-        self._load_index()
-    
-    def _load_index(self) -> None:
-        """Load papers index from disk on startup."""
-        if os.path.exists(self.index_path):
-            try:
-                with open(self.index_path, "r", encoding="utf-8") as f:
-                    self.papers = json.load(f)
-            except Exception:
-                self.papers = {}
-        else:
-            self.papers = {}
-    
-    def _save_index(self) -> None:
-        """Persist papers index to disk."""
-        with open(self.index_path, "w", encoding="utf-8") as f:
-            json.dump(self.papers, f, ensure_ascii=False, indent=2)
-    
+        # Papers live in the shared KV store so every worker sees every upload
+        self.papers = KVNamespace("papers")
+        self._import_legacy_index()
+
+    def _import_legacy_index(self) -> None:
+        """One-time import of the papers_index.json written by older versions."""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+        except Exception:
+            return
+        for paper_id, meta in legacy.items():
+            self.papers.insert_new(paper_id, meta)
+        try:
+            os.replace(self.index_path, self.index_path + ".imported")
+        except FileNotFoundError:
+            pass  # another worker finished the import first
+
     def save_upload(self, fileobj, filename: str) -> Tuple[str, str]:
         ext = os.path.splitext(filename)[1].lower()
         paper_id = str(uuid.uuid4())
@@ -34,7 +37,6 @@ class Storage:
             shutil.copyfileobj(fileobj, f)
         # Persist to index
         self.papers[paper_id] = {"path": out, "filename": filename}
-        self._save_index()
         return paper_id, out
     
     def get_paper(self, paper_id: str) -> Dict[str, str] | None:
@@ -43,6 +45,6 @@ class Storage:
     
     def list_papers(self) -> Dict[str, Dict[str, str]]:
         """List all papers."""
-        return self.papers
+        return self.papers.to_dict()
 
 storage = Storage()
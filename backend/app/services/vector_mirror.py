@@ -0,0 +1,88 @@
+from __future__ import annotations
+import math
+import operator
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; scoring falls back to pure Python dot products
+    np = None
+
+from ..config import settings
+
+# In-process copy of the vectors this process upserted, per (namespace, doc_id), so queries
+# scoped to one paper are ranked locally instead of round-tripping to Pinecone. It also
+# answers the query that follows an inline ingest, before Pinecone has made the fresh
+# vectors searchable. Papers indexed elsewhere (ingest pool, Celery, an earlier process)
+# have no mirror and are queried on Pinecone as before.
+_Key = Tuple[str, str]
+
+
+class _DocVectors:
+    def __init__(self):
+        self.rows: Dict[str, tuple[List[float], dict]] = {}  # vector id -> (unit vector, metadata)
+        self._matrix = None  # (metas, numpy matrix), rebuilt after an update
+
+    def update(self, vects: List[dict]) -> None:
+        # Same semantics as a Pinecone upsert: an existing id is overwritten
+        for v in vects:
+            self.rows[v["id"]] = (_normalize(v["values"]), v["metadata"])
+        self._matrix = None
+
+    def top(self, q: List[float], k: int) -> List[tuple[float, dict]]:
+        if np is not None:
+            if self._matrix is None:
+                metas = [meta for _, meta in self.rows.values()]
+                self._matrix = (metas, np.asarray([vec for vec, _ in self.rows.values()], dtype=np.float32))
+            metas, mat = self._matrix
+            scores = mat @ np.asarray(q, dtype=np.float32)
+            order = np.argsort(-scores)[:k]
+            return [(float(scores[i]), metas[i]) for i in order]
+        scored = [(sum(map(operator.mul, vec, q)), meta) for vec, meta in self.rows.values()]
+        scored.sort(key=operator.itemgetter(0), reverse=True)
+        return scored[:k]
+
+
+_DOCS: "OrderedDict[_Key, _DocVectors]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _normalize(vec: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+def record(namespace: str, doc_id: str, vects: List[dict]) -> None:
+    """Mirror upserted vectors ({"id", "values", "metadata"}) of one paper."""
+    if settings.rag_mirror_docs <= 0:
+        return
+    key = (namespace, doc_id)
+    with _LOCK:
+        doc = _DOCS.get(key)
+        if doc is None:
+            doc = _DOCS[key] = _DocVectors()
+        doc.update(vects)
+        _DOCS.move_to_end(key)
+        if len(doc.rows) > settings.rag_mirror_max_chunks:
+            del _DOCS[key]  # too large to rank in process; Pinecone serves it
+        while len(_DOCS) > settings.rag_mirror_docs:
+            _DOCS.popitem(last=False)
+
+
+def forget(namespace: str, doc_id: str) -> None:
+    with _LOCK:
+        _DOCS.pop((namespace, doc_id), None)
+
+
+def search(namespace: str, doc_id: str, emb: List[float], k: int) -> List[dict] | None:
+    """Top-k matches in the _query_vector result shape, or None when the paper is not mirrored."""
+    with _LOCK:
+        doc = _DOCS.get((namespace, doc_id))
+        if doc is None:
+            return None
+        _DOCS.move_to_end((namespace, doc_id))
+        hits = doc.top(_normalize(emb), k)
+    return [{"text": meta.get("text", ""), "score": score, "metadata": meta} for score, meta in hits]
+
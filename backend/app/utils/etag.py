@@ -0,0 +1,32 @@
+from __future__ import annotations
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+from .jsonutil import dumps_bytes
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag in tags or "*" in tags
+
+
+def not_modified(request: Request, etag: str, cache_control: str = "private, max-age=5") -> Response | None:
+    """304 response when the client already holds etag, else None."""
+    if _matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+def etag_json_response(request: Request, payload: Any, cache_control: str = "private, max-age=5") -> Response:
+    """Serialize payload once, tag it with a content hash, and answer 304 if the client has it."""
+    body = dumps_bytes(payload)
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    cached = not_modified(request, etag, cache_control)
+    if cached is not None:
+        return cached
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": cache_control})
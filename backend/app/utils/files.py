@@ -0,0 +1,19 @@
+from __future__ import annotations
+import os
+import threading
+
+
+def write_atomic(path: str, data: bytes | str) -> None:
+    """Write data to path via a temp file and rename, so a reader (in any process) or a
+    crash mid-write never leaves a truncated file behind."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,27 @@
+from __future__ import annotations
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+# Compact UTF-8 JSON for everything persisted or hashed into ETags; orjson when installed
+# (several times faster on large nested results), the stdlib otherwise.
+
+
+def dumps_bytes(obj: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")
+
+
+def dumps(obj: Any, default: Callable[[Any], Any] | None = None) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default)
+
+
+def loads(data: str | bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Iterator
+
+from ..config import settings
+from .jsonutil import dumps, loads
+
+# Shared key/value state (papers, users, tokens, UI settings) in one SQLite file, so
+# every uvicorn worker sees the same view and nothing is lost on restart. WAL mode
+# lets readers proceed while another worker writes.
+KV_PATH = os.path.join(settings.storage_dir, "kv.sqlite3")
+os.makedirs(settings.storage_dir, exist_ok=True)
+
+_local = threading.local()
+
+
+def _conn() -> sqlite3.Connection:
+    """One connection per thread (sqlite3 connections must not be shared across threads)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(KV_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (ns, key)) WITHOUT ROWID"
+        )
+        _local.conn = conn
+    return conn
+
+
+class KVNamespace(MutableMapping):
+    """dict-like view of one namespace of the shared store; values are JSON-encoded (compact)."""
+
+    def __init__(self, ns: str):
+        self.ns = ns
+
+    def __getitem__(self, key: str) -> Any:
+        row = _conn().execute("SELECT value FROM kv WHERE ns = ? AND key = ?", (self.ns, key)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return loads(row[0])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        return _conn().execute("SELECT 1 FROM kv WHERE ns = ? AND key = ?", (self.ns, key)).fetchone() is not None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        _conn().execute(
+            "INSERT OR REPLACE INTO kv (ns, key, value) VALUES (?, ?, ?)",
+            (self.ns, key, dumps(value)),
+        )
+
+    def insert_new(self, key: str, value: Any) -> bool:
+        """Set key only if absent (atomic across workers); returns False if it already existed."""
+        cur = _conn().execute(
+            "INSERT OR IGNORE INTO kv (ns, key, value) VALUES (?, ?, ?)",
+            (self.ns, key, dumps(value)),
+        )
+        return cur.rowcount == 1
+
+    def __delitem__(self, key: str) -> None:
+        cur = _conn().execute("DELETE FROM kv WHERE ns = ? AND key = ?", (self.ns, key))
+        if cur.rowcount == 0:
+            raise KeyError(key)
+
+    def prune(self, field: str, cutoff: float) -> int:
+        """Delete entries whose JSON value has value[field] < cutoff; returns how many went."""
+        cur = _conn().execute(
+            "DELETE FROM kv WHERE ns = ? AND json_extract(value, ?) < ?",
+            (self.ns, f"$.{field}", cutoff),
+        )
+        return cur.rowcount
+
+    def __iter__(self) -> Iterator[str]:
+        rows = _conn().execute("SELECT key FROM kv WHERE ns = ?", (self.ns,)).fetchall()
+        return iter([r[0] for r in rows])
+
+    def __len__(self) -> int:
+        return _conn().execute("SELECT COUNT(*) FROM kv WHERE ns = ?", (self.ns,)).fetchone()[0]
+
+    def to_dict(self) -> dict[str, Any]:
+        rows = _conn().execute("SELECT key, value FROM kv WHERE ns = ?", (self.ns,)).fetchall()
+        return {k: loads(v) for k, v in rows}
@@ -1,35 +1,73 @@
+import atexit
 import logging
+import queue
 import sys
 import functools
+import inspect
 import time
+from logging.handlers import QueueHandler, QueueListener
 
 _DEF_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 
 _initialized = False
 
+
+def _configure() -> None:
+    """Root logging goes through a queue: callers only enqueue the record, and one
+    listener thread does the formatting and stdout writes (flushed at exit)."""
+    if logging.getLogger().handlers:
+        return  # configured by someone else (same rule as basicConfig)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter(_DEF_FORMAT))
+    q = queue.SimpleQueue()
+    listener = QueueListener(q, stream, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    handler = QueueHandler(q)
+    handler.setFormatter(logging.Formatter("%(message)s"))  # merge args/traceback only; layout is the listener's
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+
 def get_logger(name: str) -> logging.Logger:
     global _initialized
     if not _initialized:
-        logging.basicConfig(level=logging.INFO, format=_DEF_FORMAT, stream=sys.stdout)
+        _configure()
         _initialized = True
     return logging.getLogger(name)
 
 
 def track_api_call(call_type: str):
-    """Decorator to track and log API calls"""
+    """Decorator to track and log API calls (sync or async)"""
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                logger = get_logger(func.__module__)
+                start = time.perf_counter()
+                logger.info(f"[API_CALL_START] {call_type} - Function: {func.__name__}")
+                try:
+                    result = await func(*args, **kwargs)
+                    duration = time.perf_counter() - start
+                    logger.info(f"[API_CALL_SUCCESS] {call_type} completed in {duration:.2f}s")
+                    return result
+                except Exception as e:
+                    duration = time.perf_counter() - start
+                    logger.error(f"[API_CALL_FAILED] {call_type} failed after {duration:.2f}s: {e}")
+                    raise
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             logger = get_logger(func.__module__)
-            start = time.time()
+            start = time.perf_counter()
             logger.info(f"[API_CALL_START] {call_type} - Function: {func.__name__}")
             try:
                 result = func(*args, **kwargs)
-                duration = time.time() - start
+                duration = time.perf_counter() - start
                 logger.info(f"[API_CALL_SUCCESS] {call_type} completed in {duration:.2f}s")
                 return result
             except Exception as e:
-                duration = time.time() - start
+                duration = time.perf_counter() - start
                 logger.error(f"[API_CALL_FAILED] {call_type} failed after {duration:.2f}s: {e}")
                 raise
         return wrapper
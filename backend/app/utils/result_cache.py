@@ -0,0 +1,98 @@
+from __future__ import annotations
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+from ..config import settings
+from .files import write_atomic
+from .jsonutil import dumps_bytes, loads
+
+# Whole-pipeline results: an in-memory LRU in front of one JSON file per key.
+# Kept apart from sessions so cache entries never show up in history.
+CACHE_DIR = os.path.join(settings.storage_dir, "cache")
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+_MEM: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+_LOCK = threading.Lock()
+# Expired entries are only noticed when read again; put() also sweeps them, at most this often
+_SWEEP_INTERVAL = 3600.0
+_last_sweep = 0.0
+
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _remember(key: str, updated_at: float, value: Dict[str, Any]) -> None:
+    with _LOCK:
+        _MEM[key] = (updated_at, value)
+        _MEM.move_to_end(key)
+        while len(_MEM) > settings.cache_max_entries:
+            _MEM.popitem(last=False)
+
+
+def get(key: str, max_age: float) -> Dict[str, Any] | None:
+    """Return the cached result for key if it is younger than max_age seconds."""
+    with _LOCK:
+        item = _MEM.get(key)
+        if item is not None:
+            _MEM.move_to_end(key)
+    if item is None:
+        try:
+            with open(_path(key), "rb") as f:
+                data = loads(f.read())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            return None  # damaged entry (written in place by an older version); recomputed on put
+        item = (data.get("updated_at", 0), data.get("result"))
+        _remember(key, *item)
+    updated_at, value = item
+    if time.time() - updated_at > max_age:
+        return None
+    return value
+
+
+def put(key: str, value: Dict[str, Any]) -> None:
+    updated_at = int(time.time())
+    write_atomic(_path(key), dumps_bytes({"result": value, "updated_at": updated_at}))
+    _remember(key, updated_at, value)
+    _sweep(updated_at)
+
+
+def _sweep(now: float) -> None:
+    """Delete entry files (and stray temp files) older than result_cache_ttl, by mtime."""
+    global _last_sweep
+    with _LOCK:
+        if now - _last_sweep < _SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+    cutoff = now - settings.result_cache_ttl
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith((".json", ".tmp")) or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass  # removed concurrently by another worker
+
+
+@functools.lru_cache(maxsize=256)
+def _file_sha256(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    """sha256 of a file's contents, re-hashed only when its mtime or size changes."""
+    st = os.stat(path)
+    return _file_sha256(path, st.st_mtime_ns, st.st_size)
@@ -1,11 +1,60 @@
+import hashlib
 import secrets
 
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # optional; fall back to the stdlib's scrypt
+    PasswordHasher = None
+
+_ph = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2) if PasswordHasher is not None else None
+_SCRYPT = {"n": 2 ** 14, "r": 8, "p": 1}
+_LEGACY_PREFIX = "hashed:"  # plaintext placeholder stored by older versions
+
+
+def _scrypt(pw: str, salt: bytes) -> bytes:
+    return hashlib.scrypt(pw.encode("utf-8"), salt=salt, **_SCRYPT)
+
+
 def hash_password(pw: str) -> str:
-    # Placeholder only; replace with bcrypt/argon2 in production
-    return f"hashed:{pw}"
+    if _ph is not None:
+        return _ph.hash(pw)
+    salt = secrets.token_bytes(16)
+    return f"scrypt${salt.hex()}${_scrypt(pw, salt).hex()}"
+
 
 def verify_password(pw: str, hashed: str) -> bool:
-    return hashed == hash_password(pw)
+    # Every comparison is constant-time, so response timing does not leak how much matched
+    if hashed.startswith("$argon2"):
+        if _ph is None:
+            return False
+        try:
+            return _ph.verify(hashed, pw)
+        except (VerificationError, InvalidHashError):
+            return False
+    if hashed.startswith("scrypt$"):
+        try:
+            _, salt, digest = hashed.split("$", 2)
+            return secrets.compare_digest(_scrypt(pw, bytes.fromhex(salt)).hex(), digest)
+        except (ValueError, TypeError):
+            return False  # malformed stored value (bad layout, non-hex or non-ASCII digest)
+    if hashed.startswith(_LEGACY_PREFIX):
+        return secrets.compare_digest(hashed.encode("utf-8"), (_LEGACY_PREFIX + pw).encode("utf-8"))
+    return False
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True when a verified hash should be replaced: legacy plaintext rows, scrypt rows once
+    argon2 is available, and argon2 hashes made with older parameters."""
+    if _ph is None:
+        return not hashed.startswith("scrypt$")
+    if not hashed.startswith("$argon2"):
+        return True
+    try:
+        return _ph.check_needs_rehash(hashed)
+    except InvalidHashError:
+        return True
+
 
 def gen_token() -> str:
     return secrets.token_urlsafe(24)
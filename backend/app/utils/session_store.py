@@ -1,42 +1,89 @@
 from __future__ import annotations
-import json
 import os
 import time
 from typing import Any, Dict, List
 
 from ..config import settings
+from .jsonutil import dumps, loads
+from .kv import _conn
+from .logger import get_logger
 
+logger = get_logger(__name__)
+
+# Sessions live in their own table of the shared SQLite file (WAL, one connection per
+# thread, see kv.py): a save is one INSERT OR REPLACE, every worker reads the same rows,
+# and listings are one query on the updated_at index. The summary column keeps history
+# listings from parsing full results.
 SESS_DIR = os.path.join(settings.storage_dir, "sessions")
-os.makedirs(SESS_DIR, exist_ok=True)
 
+_conn().executescript(
+    "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+    "summary TEXT NOT NULL, updated_at INTEGER NOT NULL);"
+    "CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at DESC);"
+)
+
+
+def _summary(session_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    # Handle both old single-paper and new multi-paper sessions
+    paper_ids = data.get("paper_ids", [data.get("paper_id")] if data.get("paper_id") else [])
+    return {
+        "session_id": session_id,
+        "status": data.get("status", "done"),
+        "paper_count": data.get("paper_count", len(paper_ids)),
+        "paper_ids": paper_ids,
+        "updated_at": data.get("updated_at", 0),
+    }
+
+
+def _put(session_id: str, data: Dict[str, Any], replace: bool = True) -> None:
+    _conn().execute(
+        f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO sessions (id, data, summary, updated_at) VALUES (?, ?, ?, ?)",
+        (
+            session_id,
+            dumps(data, default=str),
+            dumps(_summary(session_id, data)),
+            int(data.get("updated_at", 0)),
+        ),
+    )
+
+
+def _import_legacy_files() -> None:
+    """One-time import of the per-session JSON files written by older versions."""
+    if not os.path.isdir(SESS_DIR):
+        return
+    for name in os.listdir(SESS_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(SESS_DIR, name), "rb") as f:
+                _put(name[:-5], loads(f.read()), replace=False)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable session file {name}: {e}")
+    try:
+        os.replace(SESS_DIR, SESS_DIR + ".imported")
+    except OSError:
+        pass  # another worker finished the import first
 
-def _path(session_id: str) -> str:
-    return os.path.join(SESS_DIR, f"{session_id}.json")
+
+_import_legacy_files()
 
 
 def save_session(session_id: str, data: Dict[str, Any]) -> None:
-    data = {**data, "updated_at": int(time.time())}
-    with open(_path(session_id), "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    _put(session_id, {**data, "updated_at": int(time.time())})
 
 
 def get_session(session_id: str) -> Dict[str, Any] | None:
-    p = _path(session_id)
-    if not os.path.exists(p):
-        return None
-    with open(p, "r", encoding="utf-8") as f:
-        return json.load(f)
+    row = _conn().execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    return loads(row[0]) if row is not None else None
 
 
 def list_sessions() -> List[Dict[str, Any]]:
-    items: List[Dict[str, Any]] = []
-    for name in sorted(os.listdir(SESS_DIR)):
-        if not name.endswith(".json"):
-            continue
-        sid = name[:-5]
-        data = get_session(sid)
-        if data:
-            items.append({"session_id": sid, **data})
     # most recent first
-    items.sort(key=lambda x: x.get("updated_at", 0), reverse=True)
-    return items
+    rows = _conn().execute("SELECT id, data FROM sessions ORDER BY updated_at DESC").fetchall()
+    return [{"session_id": sid, **loads(data)} for sid, data in rows]
+
+
+def list_session_summaries() -> List[Dict[str, Any]]:
+    """Like list_sessions, but only {session_id, status, paper_count, paper_ids, updated_at}."""
+    rows = _conn().execute("SELECT summary FROM sessions ORDER BY updated_at DESC").fetchall()
+    return [loads(r[0]) for r in rows]
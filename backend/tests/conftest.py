@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Settings are read once at import time, so point storage at a scratch directory (and give
+# the API clients dummy keys) before any test imports the app
+os.environ["STORAGE_DIR"] = tempfile.mkdtemp(prefix="research-agent-tests-")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+os.environ.setdefault("PINECONE_API_KEY", "test-key")
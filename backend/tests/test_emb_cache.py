@@ -0,0 +1,26 @@
+import os
+
+from app.services import rag
+
+
+def test_emb_disk_round_trip():
+    vec = [i / 8 for i in range(rag._KNOWN_EMB_DIM or 8)]  # exact in float32
+    rag._emb_disk_put("roundtrip", vec)
+    assert rag._emb_disk_get("roundtrip") == vec
+
+
+def test_emb_disk_missing_is_a_miss():
+    assert rag._emb_disk_get("never-written") is None
+
+
+def test_emb_disk_discards_bad_length():
+    path = os.path.join(rag._EMB_DIR, "truncated")
+    with open(path, "wb") as f:
+        f.write(b"\x00" * 10)  # not a whole number of float32s
+    assert rag._emb_disk_get("truncated") is None
+    assert not os.path.exists(path)
+
+
+def test_emb_disk_leaves_no_temp_files():
+    rag._emb_disk_put("atomic", [0.0] * (rag._KNOWN_EMB_DIM or 8))
+    assert not [n for n in os.listdir(rag._EMB_DIR) if n.endswith(".tmp")]
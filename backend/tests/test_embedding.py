@@ -0,0 +1,37 @@
+from app.services import rag
+
+
+def _fake_embed(calls):
+    dim = rag._KNOWN_EMB_DIM or 8
+
+    def embed_content(model, content, task_type):
+        calls.append(list(content))
+        return {"embeddings": [[float(len(t))] * dim for t in content]}
+
+    return embed_content
+
+
+def test_repeats_are_embedded_once_and_fanned_out_in_order(monkeypatch):
+    calls = []
+    monkeypatch.setattr(rag, "configure_genai", lambda: True)
+    monkeypatch.setattr(rag.genai, "embed_content", _fake_embed(calls))
+    texts = ["dedupe a", "dedupe bb", "dedupe a", "dedupe ccc", "dedupe bb"]
+    out = rag._embedding_for_batch(texts)
+    assert calls == [["dedupe a", "dedupe bb", "dedupe ccc"]]
+    assert [v[0] for v in out] == [float(len(t)) for t in texts]
+
+
+def test_cached_texts_skip_the_call(monkeypatch):
+    calls = []
+    monkeypatch.setattr(rag, "configure_genai", lambda: True)
+    monkeypatch.setattr(rag.genai, "embed_content", _fake_embed(calls))
+    rag._embedding_for_batch(["cached once"])
+    out = rag._embedding_for_batch(["fresh one", "cached once", "fresh one"])
+    assert calls == [["cached once"], ["fresh one"]]
+    assert [v[0] for v in out] == [9.0, 11.0, 9.0]
+
+
+def test_emb_fan_out_copies_first_occurrence():
+    results = [[1.0], [2.0], None, None]
+    rag._emb_fan_out(["a", "b", "a", "b"], results)
+    assert results == [[1.0], [2.0], [1.0], [2.0]]
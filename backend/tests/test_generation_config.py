@@ -0,0 +1,31 @@
+from app.services import llm
+
+
+class _Resp:
+    text = "ok"
+    prompt_feedback = None
+    candidates = []
+
+
+class _RecordingModel:
+    def __init__(self):
+        self.configs = []
+
+    def generate_content(self, parts, generation_config=None, **kwargs):
+        self.configs.append(generation_config)
+        return _Resp()
+
+
+def test_temperature_is_left_to_the_model_by_default(monkeypatch):
+    model = _RecordingModel()
+    monkeypatch.setattr(llm, "_model", lambda: model)
+    assert llm._gen_with_retry([{"text": "default sampling please"}], 32) == "ok"
+    assert model.configs == [{"max_output_tokens": 32}]
+
+
+def test_configured_temperature_is_sent(monkeypatch):
+    model = _RecordingModel()
+    monkeypatch.setattr(llm, "_model", lambda: model)
+    monkeypatch.setattr(llm, "_TEMPERATURE", {"temperature": 0.0})
+    llm._gen_with_retry([{"text": "pinned sampling please"}], 32)
+    assert model.configs == [{"max_output_tokens": 32, "temperature": 0.0}]
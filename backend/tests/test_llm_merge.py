@@ -0,0 +1,50 @@
+import time
+
+from app.config import settings
+from app.services import chunking
+from app.services.chunking import utf8_len
+from app.services.llm import LLMClient
+
+
+def _response(summary, critique, findings, citations):
+    return (
+        f"=== SUMMARY ===\n{summary}\n=== CRITIQUE ===\n{critique}\n"
+        "=== KEY FINDINGS ===\n" + "\n".join(f"- {f}" for f in findings) + "\n"
+        "=== CITATIONS ===\n" + "\n".join(f"- {c}" for c in citations) + "\n"
+    )
+
+
+def test_finish_chunked_joins_prose_and_dedupes_lists():
+    responses = [
+        _response("First part.", "Weak baseline.", ["Finding A", "Finding B"], ["Smith (2020)"]),
+        _response("Second part.", "Small dataset.", ["finding  a", "Finding C"], ["Smith (2020)", "Lee (2021)"]),
+    ]
+    merged = LLMClient._finish_chunked(responses, "p1", time.perf_counter())
+    assert merged["summary"] == "First part.\n\nSecond part."
+    assert merged["critique"] == "Weak baseline.\n\nSmall dataset."
+    assert merged["key_findings"] == ["Finding A", "Finding B", "Finding C"]
+    assert merged["citations"] == ["Smith (2020)", "Lee (2021)"]
+
+
+def test_finish_chunked_caps_lists_at_five():
+    responses = [_response(f"S{i}", "", [f"F{i}a", f"F{i}b"], []) for i in range(4)]
+    merged = LLMClient._finish_chunked(responses, None, time.perf_counter())
+    assert merged["key_findings"] == ["F0a", "F0b", "F1a", "F1b", "F2a"]
+
+
+def _paper_content(parts):
+    body = parts[1]["text"]
+    start = body.index("**Paper Content:**\n") + len("**Paper Content:**\n")
+    return body[start:body.rindex("\n\nRemember to use the EXACT")]
+
+
+def test_oversize_chunks_arrive_untruncated(monkeypatch):
+    # Accented text under the ~4 characters per token estimate packs chunks past the byte budget
+    monkeypatch.setattr(chunking, "_encoder", lambda: None)
+    paragraphs = [f"Paragraphe {i}: " + "éléphant café déjà vu " * 120 for i in range(60)]
+    parts_list = LLMClient()._oversize_parts("\n\n".join(paragraphs), "medium", "some context", "p1")
+    sent = [_paper_content(parts) for parts in parts_list]
+    assert len(sent) > 1
+    assert all(utf8_len(s) <= settings.gemini_max_total_bytes for s in sent)
+    joined = "".join(sent)
+    assert all(p.strip() in joined for p in paragraphs)
@@ -0,0 +1,27 @@
+import asyncio
+
+from app.services import llm
+
+
+class _HangingModel:
+    """generate_content_async that never returns, like a stalled network call."""
+
+    async def generate_content_async(self, parts, generation_config=None, stream=False):
+        await asyncio.Event().wait()
+
+
+def test_cancelled_stream_open_releases_its_slot(monkeypatch):
+    monkeypatch.setattr(llm, "_model", lambda: _HangingModel())
+
+    async def run():
+        free = llm._GEN_SEM._value
+        agen = llm._gen_stream_async([{"text": "cancel me"}], 64)
+        task = asyncio.ensure_future(agen.__anext__())
+        await asyncio.sleep(0.05)
+        assert llm._GEN_SEM._value == free - 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return free
+
+    free = asyncio.run(run())
+    assert llm._GEN_SEM._value == free
@@ -0,0 +1,24 @@
+from app.services.llm import _parse_structured_response
+
+
+def test_markdown_headings():
+    parsed = _parse_structured_response("## Summary\nThis is it.\n## Critique\nBad.\n## Key Findings\n- One\n- Two\n")
+    assert parsed["summary"] == "This is it."
+    assert parsed["critique"] == "Bad."
+    assert parsed["key_findings"] == ["One", "Two"]
+
+
+def test_markdown_headings_with_crlf_line_ends():
+    parsed = _parse_structured_response("## Summary\r\nThis is it.\r\n## Critique\r\nBad.\r\n")
+    assert parsed["summary"] == "This is it."
+    assert parsed["critique"] == "Bad."
+
+
+def test_strict_delimiters():
+    text = "=== SUMMARY ===\nS.\n=== CRITIQUE ===\nC.\n=== CITATIONS ===\n- Smith (2020)\n"
+    parsed = _parse_structured_response(text)
+    assert (parsed["summary"], parsed["critique"], parsed["citations"]) == ("S.", "C.", ["Smith (2020)"])
+
+
+def test_unstructured_text_becomes_the_summary():
+    assert _parse_structured_response("just prose")["summary"] == "just prose"
@@ -0,0 +1,38 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.services import pdf
+
+
+class _FakeDocument:
+    """Stands in for pypdfium2.PdfDocument and records how many are open at once."""
+
+    open_now = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, path):
+        with _FakeDocument.lock:
+            _FakeDocument.open_now += 1
+            _FakeDocument.peak = max(_FakeDocument.peak, _FakeDocument.open_now)
+        self.path = path
+
+    def __iter__(self):
+        for i in range(3):
+            time.sleep(0.01)
+            text = SimpleNamespace(get_text_range=lambda i=i: f"{self.path} page {i}\r\n", close=lambda: None)
+            yield SimpleNamespace(get_textpage=lambda text=text: text, close=lambda: None)
+
+    def close(self):
+        with _FakeDocument.lock:
+            _FakeDocument.open_now -= 1
+
+
+def test_pdfium_documents_are_never_open_concurrently(monkeypatch):
+    monkeypatch.setattr(pdf, "pdfium", SimpleNamespace(PdfDocument=_FakeDocument))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        texts = list(pool.map(pdf.extract_text, [f"doc{i}.pdf" for i in range(4)]))
+    assert _FakeDocument.peak == 1
+    assert texts[2] == "doc2.pdf page 0\n\n\ndoc2.pdf page 1\n\n\ndoc2.pdf page 2\n"
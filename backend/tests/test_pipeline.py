@@ -0,0 +1,15 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from app.agents import graph
+
+
+def test_invalid_options_fail_before_ingest_starts(monkeypatch):
+    started = []
+    monkeypatch.setattr(graph, "is_indexed", lambda doc_id: False)
+    monkeypatch.setattr(graph, "ingest_pdf", lambda doc_id, path: started.append(doc_id))
+    with pytest.raises(ValidationError):
+        asyncio.run(graph.pipeline.run("/paper.pdf", {"focus_area": "not-a-focus"}, "p1"))
+    assert started == []
@@ -0,0 +1,38 @@
+import os
+import time
+
+from app.utils import result_cache
+
+
+def test_round_trip():
+    result_cache.put("k1", {"summary": "s", "key_findings": ["a", "b"]})
+    assert result_cache.get("k1", max_age=60) == {"summary": "s", "key_findings": ["a", "b"]}
+
+
+def test_reads_back_from_disk():
+    result_cache.put("k2", {"summary": "from disk"})
+    result_cache._MEM.clear()
+    assert result_cache.get("k2", max_age=60) == {"summary": "from disk"}
+
+
+def test_honours_max_age():
+    result_cache.put("k3", {"summary": "old"})
+    assert result_cache.get("k3", max_age=-1) is None
+
+
+def test_damaged_file_is_a_miss():
+    with open(result_cache._path("k4"), "wb") as f:
+        f.write(b'{"result": {"summ')
+    assert result_cache.get("k4", max_age=60) is None
+
+
+def test_put_sweeps_expired_files(monkeypatch):
+    stale = result_cache._path("stale")
+    with open(stale, "w", encoding="utf-8") as f:
+        f.write('{"result": {}, "updated_at": 0}')
+    old = time.time() - result_cache.settings.result_cache_ttl - 60
+    os.utime(stale, (old, old))
+    monkeypatch.setattr(result_cache, "_last_sweep", 0.0)
+    result_cache.put("fresh", {"summary": "s"})
+    assert not os.path.exists(stale)
+    assert result_cache.get("fresh", max_age=60) == {"summary": "s"}
@@ -0,0 +1,32 @@
+from app.utils import security
+from app.utils.security import hash_password, needs_rehash, verify_password
+
+
+def test_hash_round_trip():
+    hashed = hash_password("s3cret")
+    assert verify_password("s3cret", hashed)
+    assert not verify_password("wrong", hashed)
+    assert not needs_rehash(hashed)
+
+
+def test_scrypt_format():
+    salt = bytes(16)
+    hashed = f"scrypt${salt.hex()}${security._scrypt('pw', salt).hex()}"
+    assert verify_password("pw", hashed)
+    assert not verify_password("other", hashed)
+
+
+def test_legacy_plaintext_rows_verify_and_need_rehash():
+    assert verify_password("pw", "hashed:pw")
+    assert not verify_password("pw2", "hashed:pw")
+    assert needs_rehash("hashed:pw")
+
+
+def test_malformed_scrypt_values_fail_closed():
+    for hashed in ["scrypt$", "scrypt$nothex$00", "scrypt$00", "scrypt$0011$é"]:
+        assert verify_password("pw", hashed) is False
+
+
+def test_unknown_format_is_rejected():
+    assert not verify_password("pw", "pw")
+    assert not verify_password("pw", "")
@@ -0,0 +1,32 @@
+from app.services import llm, semantic_cache
+
+_TEXT = "Transformers replace recurrence with attention. " * 20
+
+
+def _unit(n=8):
+    return [1.0] + [0.0] * (n - 1)
+
+
+def test_tasks_over_the_same_text_do_not_share_entries():
+    client = llm.LLMClient()
+    summary = client._summarize_parts(_TEXT, "medium", "")[0]
+    critique = client._critique_parts(_TEXT, "")[0]
+    # Same paper content, so the embedded probe alone cannot tell the tasks apart
+    assert semantic_cache.probe_text(summary) == semantic_cache.probe_text(critique)
+    tokens = llm.settings.gemini_max_output_tokens
+    summary_bucket = llm._semantic_bucket(summary, tokens)
+    critique_bucket = llm._semantic_bucket(critique, tokens)
+    assert summary_bucket != critique_bucket
+
+    semantic_cache.store((summary_bucket, _unit()), "a cached summary")
+    assert semantic_cache.lookup(critique_bucket, _unit()) is None
+    assert semantic_cache.lookup(summary_bucket, _unit()) == "a cached summary"
+
+
+def test_fill_missing_specs_get_their_own_buckets():
+    client = llm.LLMClient()
+    critique = client._fill_missing_parts(_TEXT, "", ["critique"])
+    citations = client._fill_missing_parts(_TEXT, "", ["citations"])
+    tokens = llm.settings.gemini_max_output_tokens
+    semantic_cache.store((llm._semantic_bucket(critique, tokens), _unit()), '{"critique": "x"}')
+    assert semantic_cache.lookup(llm._semantic_bucket(citations, tokens), _unit()) is None
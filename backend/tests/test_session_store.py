@@ -0,0 +1,18 @@
+import json
+
+from app.utils import session_store
+
+
+def test_session_files_are_imported(monkeypatch, tmp_path):
+    sess_dir = tmp_path / "sessions"
+    sess_dir.mkdir()
+    (sess_dir / "s-old.json").write_text(json.dumps({"paper_id": "p1", "status": "done", "updated_at": 5}))
+    (sess_dir / "broken.json").write_text("{")
+    (sess_dir / "notes.txt").write_text("ignored")
+    monkeypatch.setattr(session_store, "SESS_DIR", str(sess_dir))
+    session_store._import_legacy_files()
+    assert session_store.get_session("s-old")["paper_id"] == "p1"
+    assert session_store.get_session("broken") is None
+    summary = next(s for s in session_store.list_session_summaries() if s["session_id"] == "s-old")
+    assert summary["paper_ids"] == ["p1"] and summary["paper_count"] == 1
+    assert not sess_dir.exists() and (tmp_path / "sessions.imported").exists()
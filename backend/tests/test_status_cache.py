@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.session_store import save_session
+
+client = TestClient(app)
+
+
+def test_unknown_job_must_be_revalidated():
+    r = client.get("/analysis/status/no-such-job")
+    assert r.json()["status"] == "pending"
+    assert "no-cache" in r.headers["cache-control"]
+
+
+def test_running_session_must_be_revalidated():
+    save_session("job-running", {"status": "running", "paper_ids": ["p"]})
+    r = client.get("/analysis/status/job-running")
+    assert "no-cache" in r.headers["cache-control"]
+
+
+def test_finished_session_may_be_reused_briefly():
+    save_session("job-done", {"status": "done", "paper_ids": ["p"], "results": {}})
+    r = client.get("/analysis/status/job-done")
+    assert r.headers["cache-control"] == "private, max-age=5"
+    again = client.get("/analysis/status/job-done", headers={"If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,23 @@
+import json
+import os
+
+from app.config import settings
+from app.services.storage import Storage
+
+
+def test_papers_index_is_imported_once():
+    index = os.path.join(settings.storage_dir, "papers_index.json")
+    with open(index, "w", encoding="utf-8") as f:
+        json.dump({"legacy-paper": {"path": "/x.pdf", "filename": "x.pdf"}}, f)
+    storage = Storage()
+    assert storage.papers["legacy-paper"] == {"path": "/x.pdf", "filename": "x.pdf"}
+    assert not os.path.exists(index) and os.path.exists(index + ".imported")
+
+
+def test_papers_import_keeps_newer_rows():
+    storage = Storage()
+    storage.papers["kept"] = {"path": "/new.pdf", "filename": "new.pdf"}
+    with open(storage.index_path, "w", encoding="utf-8") as f:
+        json.dump({"kept": {"path": "/old.pdf", "filename": "old.pdf"}}, f)
+    storage._import_legacy_index()
+    assert storage.papers["kept"]["filename"] == "new.pdf"
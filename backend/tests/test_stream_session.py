@@ -0,0 +1,30 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import analysis
+from app.utils.session_store import list_sessions
+
+client = TestClient(app)
+
+
+def test_failed_stream_still_saves_a_session(monkeypatch):
+    async def arun_stream(path, options, paper_id=None):
+        yield {"paper_id": paper_id, "section": "summary", "content": "partial"}
+        if paper_id == "stream-b":
+            raise RuntimeError("model went away")
+        yield {"paper_id": paper_id, "section": "result", "content": {"summary": "done"}}
+
+    monkeypatch.setattr(analysis, "_cached_result", lambda paper_id, options: None)
+    monkeypatch.setattr(analysis, "_remember_result", lambda paper_id, options, result: None)
+    monkeypatch.setattr(analysis.pipeline, "arun_stream", arun_stream)
+    for pid in ("stream-a", "stream-b"):
+        analysis.PAPERS[pid] = {"path": f"/{pid}.pdf", "filename": f"{pid}.pdf"}
+
+    with pytest.raises(Exception):  # TestClient re-raises the app's error
+        client.post("/analysis/stream", json={"paper_ids": ["stream-a", "stream-b"]})
+    job_id = next(s["session_id"] for s in list_sessions() if s.get("paper_ids") == ["stream-a", "stream-b"])
+
+    status = client.get(f"/analysis/status/{job_id}").json()
+    assert status["status"] == "failed"
+    assert status["results"] == {"stream-a": {"summary": "done"}}
@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.chunking import truncate_utf8
+from app.services.rag import _utf8_start
+
+_SAMPLES = ["plain ascii text", "naïve café", "a€b€c", "日本語のテキスト", "emoji 😀😀 end", "é" * 40]
+
+
+@pytest.mark.parametrize("text", _SAMPLES)
+def test_truncate_utf8_is_longest_fitting_prefix(text):
+    size = len(text.encode("utf-8"))
+    for max_bytes in range(0, size + 2):
+        out = truncate_utf8(text, max_bytes)
+        assert text.startswith(out)
+        assert len(out.encode("utf-8")) <= max_bytes
+        # one more character would not have fitted
+        if out != text:
+            assert len(text[:len(out) + 1].encode("utf-8")) > max_bytes
+
+
+def test_truncate_utf8_never_splits_a_character():
+    assert truncate_utf8("a€", 3) == "a"
+    assert truncate_utf8("a€", 4) == "a€"
+    assert truncate_utf8("😀x", 3) == ""
+
+
+def test_utf8_start_backs_off_to_character_start():
+    b = "a€b".encode("utf-8")  # 61 | e2 82 ac | 62
+    assert [_utf8_start(b, p) for p in range(len(b) + 1)] == [0, 1, 1, 1, 4, 5]
+
+
+def test_utf8_start_cut_decodes_cleanly():
+    b = "日本語 text 😀 more".encode("utf-8")
+    for p in range(len(b) + 1):
+        q = _utf8_start(b, p)
+        assert b[:q].decode("utf-8") + b[q:].decode("utf-8") == b.decode("utf-8")
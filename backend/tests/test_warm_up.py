@@ -0,0 +1,29 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app import main
+
+
+class _HangingModel:
+    async def count_tokens_async(self, text):
+        await asyncio.Event().wait()
+
+
+def test_hung_warm_up_calls_do_not_block_startup(monkeypatch):
+    released = threading.Event()
+    index = SimpleNamespace(describe_index_stats=lambda: released.wait(5))
+    monkeypatch.setattr(main, "settings", SimpleNamespace(gemini_api_key="k", pinecone_api_key="k", warmup_timeout=0.1))
+    monkeypatch.setattr(main, "_model", lambda: _HangingModel())
+    monkeypatch.setattr(main, "store", SimpleNamespace(index=index))
+
+    async def timed():
+        start = time.perf_counter()
+        try:
+            await main._warm_up()
+            return time.perf_counter() - start
+        finally:
+            released.set()  # lets the abandoned Pinecone thread end so asyncio.run can close
+
+    assert asyncio.run(timed()) < 2